@@ -5,6 +5,7 @@ Orchestrates reasoning, tool-calling, reflection, and evaluation.
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -15,15 +16,19 @@ sys.path.append(str(Path(__file__).parent / "modules"))
 
 from modules.agent_reasoning import AgentReasoning
 from modules.agent_tools import ToolRegistry, RAGQueryTool, KnowledgeSearchTool
-from modules.content_tools import BlogPostGeneratorTool, NewsletterGeneratorTool, HTMLGeneratorTool, PDFGeneratorTool
+from modules.content_tools import (
+    BlogPostGeneratorTool, NewsletterGeneratorTool, HTMLGeneratorTool, PDFGeneratorTool,
+    ContentBatchExecutor, LLMProxy, afetch_shared_context
+)
 from modules.email_tool import EmailSenderTool
 from modules.agent_evaluator import AgentEvaluator
 from modules.rag_system import RAGSystem
+from modules.semantic_cache import ContentCache
 from modules.vector_database import VectorDatabase
 
 # Import LLM clients
-from openai import OpenAI
-from anthropic import Anthropic
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 import google.generativeai as genai
 from dotenv import load_dotenv
 
@@ -35,6 +40,9 @@ class AgenticSystem:
     Main AI Agentic System that combines reasoning, tool-calling, and reflection.
     """
     
+    # Tools that accept a shared `rag_context`
+    CONTENT_TOOL_TYPES = (BlogPostGeneratorTool, NewsletterGeneratorTool, HTMLGeneratorTool, PDFGeneratorTool)
+    
     # System identity and capabilities description
     SYSTEM_IDENTITY = """I am an AI Agentic System - an advanced autonomous assistant created as part of the Ciklum AI Academy capstone project.
 
@@ -97,22 +105,50 @@ How can I help you today?"""
         self.llm_provider = llm_provider.lower()
         self.temperature = temperature
         
-        # Initialize LLM client
+        # Initialize LLM clients (the async client is shared by all content tools);
+        # pooled HTTP clients keep connections warm across calls
         if self.llm_provider == "openai":
-            self.llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.llm_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=LLMProxy.pooled_http_client()
+            )
+            self.async_llm_client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=LLMProxy.pooled_async_http_client()
+            )
             self.model_name = model_name or "gpt-3.5-turbo"
         elif self.llm_provider == "anthropic":
-            self.llm_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.llm_client = Anthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                http_client=LLMProxy.pooled_http_client()
+            )
+            self.async_llm_client = AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                http_client=LLMProxy.pooled_async_http_client()
+            )
             self.model_name = model_name or "claude-3-sonnet-20240229"
         elif self.llm_provider == "gemini":
             genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
             self.model_name = model_name or "gemini-2.5-flash"
             self.llm_client = genai.GenerativeModel(self.model_name)
+            # GenerativeModel exposes generate_content_async itself
+            self.async_llm_client = self.llm_client
         else:
             raise ValueError(f"Unsupported LLM provider: {llm_provider}")
         
+        self.llm_proxy = LLMProxy(
+            self.llm_client,
+            self.llm_provider,
+            self.model_name,
+            async_llm_client=self.async_llm_client
+        )
+        
         print(f"✓ LLM: {self.llm_provider} ({self.model_name})")
         
+        # Async clients keep connections bound to the loop they were first used on,
+        # so all tool executions share one long-lived event loop
+        self._loop = asyncio.new_event_loop()
+        
         # Initialize RAG system
         self.rag_system = RAGSystem(
             vector_db=vector_db,
@@ -149,18 +185,21 @@ How can I help you today?"""
         self.tools.register(RAGQueryTool(self.rag_system))
         self.tools.register(KnowledgeSearchTool(self.rag_system.vector_db))
         
-        # Content generation tools
+        # Content generation tools share one batch executor so their LLM requests coalesce
+        batch_executor = ContentBatchExecutor(self.llm_proxy)
+        
+        # Generated documents persist across runs; near-identical topics reuse them
+        content_cache = ContentCache(embed_fn=self.rag_system.vector_db.embed_query)
         self.tools.register(HTMLGeneratorTool(
-            self.llm_client,
-            self.llm_provider,
-            self.model_name,
-            self.rag_system
+            self.llm_proxy,
+            self.rag_system,
+            batch_executor=batch_executor
         ))
         self.tools.register(PDFGeneratorTool(
-            self.llm_client,
-            self.llm_provider,
-            self.model_name,
-            self.rag_system
+            self.llm_proxy,
+            self.rag_system,
+            batch_executor=batch_executor,
+            content_cache=content_cache
         ))
         
         # Email tool
@@ -222,10 +261,48 @@ How can I help you today?"""
             "timestamp": datetime.now().isoformat()
         }
     
+    def __enter__(self) -> "AgenticSystem":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
     def execute_task(self, task: str, auto_reflect: bool = True) -> Dict[str, Any]:
         """
         Execute a task with full agentic capabilities: reasoning, tool-calling, and reflection.
         
+        Runs aexecute_task on the system's own event loop, so it must not be
+        called from inside a running loop; async callers should await
+        aexecute_task directly.
+        
+        Args:
+            task: The task to execute
+            auto_reflect: Whether to automatically reflect on the result
+            
+        Returns:
+            Dictionary with execution results and metadata
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "execute_task() cannot be called from a running event loop; "
+                "use 'await agent.aexecute_task(...)' instead"
+            )
+        if self._loop.is_closed():
+            raise RuntimeError("AgenticSystem has been closed")
+        return self._loop.run_until_complete(self.aexecute_task(task, auto_reflect))
+    
+    async def aexecute_task(self, task: str, auto_reflect: bool = True) -> Dict[str, Any]:
+        """
+        Async version of execute_task.
+        
+        Blocking LLM calls run in worker threads so the caller's event loop stays
+        responsive. Async LLM clients bind to the first loop they are used on, so
+        keep calling this from the same loop for the lifetime of the system.
+        
         Args:
             task: The task to execute
             auto_reflect: Whether to automatically reflect on the result
@@ -243,13 +320,14 @@ How can I help you today?"""
         
         # Step 1: Reasoning
         print("🧠 REASONING...")
-        reasoning = self.reasoning.think(task)
+        reasoning = await asyncio.to_thread(self.reasoning.think, task)
         print(f"✓ Understanding: {reasoning.get('understanding', 'N/A')}")
         print(f"✓ Steps planned: {len(reasoning.get('steps', []))}")
         
         # Step 2: Tool Selection
         print("\n🔧 SELECTING TOOLS...")
-        tool_choice = self.reasoning.evaluate_tool_choice(
+        tool_choice = await asyncio.to_thread(
+            self.reasoning.evaluate_tool_choice,
             task,
             self.tools.list_tools()
         )
@@ -260,23 +338,22 @@ How can I help you today?"""
         # Step 3: Tool Execution
         print("\n⚡ EXECUTING...")
         results = []
-        for tool_name in selected_tools:
-            print(f"\n  Using tool: {tool_name}")
-            result = self._execute_tool_intelligently(tool_name, task, reasoning)
+        tool_results = await self._aexecute_tools_intelligently(selected_tools, task, reasoning)
+        for tool_name, result in zip(selected_tools, tool_results):
             results.append({
                 "tool": tool_name,
                 "result": result
             })
             
             if result.get("success"):
-                print(f"  ✓ Success")
+                print(f"  ✓ {tool_name}: Success")
             else:
-                print(f"  ✗ Failed: {result.get('error', 'Unknown error')}")
+                print(f"  ✗ {tool_name} failed: {result.get('error', 'Unknown error')}")
         
         # If no tools were selected, provide direct answer
         if not results:
             print("  No tools needed - providing direct answer...")
-            answer = self._generate_direct_answer(task)
+            answer = await asyncio.to_thread(self._generate_direct_answer, task)
             results.append({
                 "tool": "direct_answer",
                 "result": {
@@ -291,7 +368,8 @@ How can I help you today?"""
         overall_success = all(r["result"].get("success", False) for r in results)
         if auto_reflect:
             print("\n🔍 REFLECTING...")
-            reflection = self.reasoning.reflect(
+            reflection = await asyncio.to_thread(
+                self.reasoning.reflect,
                 action_taken=f"Executed {len(results)} actions for task: {task}",
                 result=results,
                 expected_outcome=reasoning.get("execution_plan", ""),
@@ -330,23 +408,51 @@ How can I help you today?"""
         
         return final_result
     
-    def _execute_tool_intelligently(self, tool_name: str, task: str, reasoning: Dict) -> Dict[str, Any]:
+    async def _aexecute_tools_intelligently(self, tool_names: List[str], task: str, reasoning: Dict) -> List[Dict[str, Any]]:
         """
-        Execute a tool with intelligent parameter extraction.
+        Execute the selected tools concurrently with intelligent parameter extraction.
         
         Args:
-            tool_name: Name of the tool
+            tool_names: Names of the tools to run
             task: Original task
             reasoning: Reasoning results
             
         Returns:
-            Tool execution result
+            Tool execution results, in the same order as tool_names
         """
-        # Extract parameters from task based on tool
-        params = self._extract_tool_parameters(tool_name, task, reasoning)
-        
-        # Execute tool
-        return self.tools.execute_tool(tool_name, **params)
+        # Extract parameters from task based on tool; each extraction is a
+        # blocking LLM call, so they run side by side in worker threads
+        for tool_name in tool_names:
+            print(f"\n  Using tool: {tool_name}")
+        tool_params = list(await asyncio.gather(*(
+            asyncio.to_thread(self._extract_tool_parameters, tool_name, task, reasoning)
+            for tool_name in tool_names
+        )))
+        
+        # Content tools working on the same topic share one RAG retrieval
+        content_topics = [
+            params.get('topic')
+            if isinstance(self.tools.get_tool(tool_name), self.CONTENT_TOOL_TYPES) and isinstance(params.get('topic'), str)
+            else None
+            for tool_name, params in zip(tool_names, tool_params)
+        ]
+        shared_topics = [
+            topic for topic in set(content_topics)
+            if topic is not None and content_topics.count(topic) > 1
+        ]
+        if shared_topics:
+            shared_contexts = dict(zip(shared_topics, await asyncio.gather(*(
+                afetch_shared_context(self.rag_system, topic) for topic in shared_topics
+            ))))
+            for topic, params in zip(content_topics, tool_params):
+                if topic in shared_contexts:
+                    params['rag_context'] = shared_contexts[topic]
+        
+        # Execute tools
+        return await asyncio.gather(*(
+            self.tools.aexecute_tool(tool_name, **params)
+            for tool_name, params in zip(tool_names, tool_params)
+        ))
     
     def _extract_tool_parameters(self, tool_name: str, task: str, reasoning: Dict) -> Dict[str, Any]:
         """
@@ -662,6 +768,14 @@ Provide clear, concise, and accurate answers to questions."""
                 break
             except Exception as e:
                 print(f"\n❌ Error: {e}")
+        
+        self.close()
+    
+    def close(self):
+        """Close the event loop shared by tool executions."""
+        if not self._loop.is_closed():
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
     
     def _display_results(self, result: Dict[str, Any]):
         """Display task execution results in a user-friendly format."""
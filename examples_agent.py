@@ -20,14 +20,13 @@ def example_system_identity():
     
     # Initialize components
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    # Ask about the agent itself
-    result = agent.execute_task("Who are you and what can you do?")
-    
-    # The agent automatically recognizes this as a self-inquiry
-    # and responds with its identity and capabilities
-    agent._display_results(result)
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        # Ask about the agent itself
+        result = agent.execute_task("Who are you and what can you do?")
+        
+        # The agent automatically recognizes this as a self-inquiry
+        # and responds with its identity and capabilities
+        agent._display_results(result)
 
 
 def example_simple_query():
@@ -38,15 +37,14 @@ def example_simple_query():
     
     # Initialize components
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    # Execute a simple query
-    result = agent.execute_task("What is machine learning?")
-    
-    # Access results
-    print("\n📊 Task Summary:")
-    print(f"Success: {result['evaluation']['overall'] > 0.5}")
-    print(f"Quality Score: {result['evaluation']['overall']:.2f}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        # Execute a simple query
+        result = agent.execute_task("What is machine learning?")
+        
+        # Access results
+        print("\n📊 Task Summary:")
+        print(f"Success: {result['evaluation']['overall'] > 0.5}")
+        print(f"Quality Score: {result['evaluation']['overall']:.2f}")
 
 
 def example_content_generation():
@@ -56,19 +54,18 @@ def example_content_generation():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    # Generate a blog post
-    result = agent.execute_task(
-        "Create a short professional blog post about artificial intelligence"
-    )
-    
-    # Check execution results
-    for exec_result in result["execution_results"]:
-        if exec_result["result"].get("success"):
-            content = exec_result["result"].get("result", {})
-            if isinstance(content, dict) and "filepath" in content:
-                print(f"\n✅ Content saved to: {content['filepath']}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        # Generate a blog post
+        result = agent.execute_task(
+            "Create a short professional blog post about artificial intelligence"
+        )
+        
+        # Check execution results
+        for exec_result in result["execution_results"]:
+            if exec_result["result"].get("success"):
+                content = exec_result["result"].get("result", {})
+                if isinstance(content, dict) and "filepath" in content:
+                    print(f"\n✅ Content saved to: {content['filepath']}")
 
 
 def example_with_reflection():
@@ -78,20 +75,19 @@ def example_with_reflection():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    result = agent.execute_task(
-        "Generate a newsletter about neural networks",
-        auto_reflect=True
-    )
-    
-    # Analyze reflection
-    reflection = result.get("reflection")
-    if reflection:
-        print("\n🔍 Reflection Analysis:")
-        print(f"Success: {reflection.get('success', False)}")
-        print(f"Strengths: {reflection.get('strengths', [])}")
-        print(f"Improvements: {reflection.get('improvements', [])}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        result = agent.execute_task(
+            "Generate a newsletter about neural networks",
+            auto_reflect=True
+        )
+        
+        # Analyze reflection
+        reflection = result.get("reflection")
+        if reflection:
+            print("\n🔍 Reflection Analysis:")
+            print(f"Success: {reflection.get('success', False)}")
+            print(f"Strengths: {reflection.get('strengths', [])}")
+            print(f"Improvements: {reflection.get('improvements', [])}")
 
 
 def example_pdf_generation():
@@ -101,20 +97,19 @@ def example_pdf_generation():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    # Generate a PDF report
-    result = agent.execute_task(
-        "Create a PDF report about machine learning best practices"
-    )
-    
-    # Check execution results
-    for exec_result in result["execution_results"]:
-        if exec_result["result"].get("success"):
-            content = exec_result["result"].get("result", {})
-            if isinstance(content, dict) and "filepath" in content:
-                print(f"\n✅ PDF saved to: {content['filepath']}")
-                print(f"📄 File size: {content.get('filename', 'N/A')}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        # Generate a PDF report
+        result = agent.execute_task(
+            "Create a PDF report about machine learning best practices"
+        )
+        
+        # Check execution results
+        for exec_result in result["execution_results"]:
+            if exec_result["result"].get("success"):
+                content = exec_result["result"].get("result", {})
+                if isinstance(content, dict) and "filepath" in content:
+                    print(f"\n✅ PDF saved to: {content['filepath']}")
+                    print(f"📄 File size: {content.get('filename', 'N/A')}")
 
 
 def example_reasoning_inspection():
@@ -124,18 +119,17 @@ def example_reasoning_inspection():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    result = agent.execute_task("Create an HTML page about deep learning")
-    
-    # Inspect reasoning
-    reasoning = result.get("reasoning", {})
-    print("\n🧠 Agent's Reasoning:")
-    print(f"Understanding: {reasoning.get('understanding', 'N/A')}")
-    print(f"\nPlanned Steps:")
-    for i, step in enumerate(reasoning.get('steps', []), 1):
-        print(f"  {i}. {step}")
-    print(f"\nTools Identified: {reasoning.get('tools_needed', [])}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        result = agent.execute_task("Create an HTML page about deep learning")
+        
+        # Inspect reasoning
+        reasoning = result.get("reasoning", {})
+        print("\n🧠 Agent's Reasoning:")
+        print(f"Understanding: {reasoning.get('understanding', 'N/A')}")
+        print(f"\nPlanned Steps:")
+        for i, step in enumerate(reasoning.get('steps', []), 1):
+            print(f"  {i}. {step}")
+        print(f"\nTools Identified: {reasoning.get('tools_needed', [])}")
 
 
 def example_performance_metrics():
@@ -145,24 +139,23 @@ def example_performance_metrics():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    # Execute multiple tasks
-    tasks = [
-        "What is deep learning?",
-        "Create a short social media post about AI",
-        "Generate a newsletter about machine learning"
-    ]
-    
-    for task in tasks:
-        print(f"\nExecuting: {task}")
-        agent.execute_task(task, auto_reflect=False)
-    
-    # Show performance summary
-    agent.evaluator.print_summary()
-    
-    # Save evaluation report
-    agent.evaluator.save_evaluation_report()
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        # Execute multiple tasks
+        tasks = [
+            "What is deep learning?",
+            "Create a short social media post about AI",
+            "Generate a newsletter about machine learning"
+        ]
+        
+        for task in tasks:
+            print(f"\nExecuting: {task}")
+            agent.execute_task(task, auto_reflect=False)
+        
+        # Show performance summary
+        agent.evaluator.print_summary()
+        
+        # Save evaluation report
+        agent.evaluator.save_evaluation_report()
 
 
 def example_tool_selection():
@@ -172,18 +165,17 @@ def example_tool_selection():
     print("="*80)
     
     vector_db = VectorDatabase(collection_name="demo_kb")
-    agent = AgenticSystem(vector_db=vector_db, llm_provider="gemini")
-    
-    result = agent.execute_task(
-        "Search for information about transformers and create a blog post"
-    )
-    
-    # Analyze tool selection
-    tool_choice = result.get("tool_selection", {})
-    print("\n🔧 Tool Selection:")
-    print(f"Selected Tools: {tool_choice.get('selected_tools', [])}")
-    print(f"Reasoning: {tool_choice.get('reasoning', 'N/A')}")
-    print(f"Confidence: {tool_choice.get('confidence', 0):.2f}")
+    with AgenticSystem(vector_db=vector_db, llm_provider="gemini") as agent:
+        result = agent.execute_task(
+            "Search for information about transformers and create a blog post"
+        )
+        
+        # Analyze tool selection
+        tool_choice = result.get("tool_selection", {})
+        print("\n🔧 Tool Selection:")
+        print(f"Selected Tools: {tool_choice.get('selected_tools', [])}")
+        print(f"Reasoning: {tool_choice.get('reasoning', 'N/A')}")
+        print(f"Confidence: {tool_choice.get('confidence', 0):.2f}")
 
 
 def run_all_examples():
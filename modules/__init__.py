@@ -1,12 +1,20 @@
 """
 Initialization file for the modules package.
+
+Public classes are imported on first access, so importing a lightweight
+submodule does not pull in torch, chromadb or whisper.
 """
 
-from .pdf_loader import PDFLoader
-from .audio_transcriber import AudioTranscriber
-from .text_chunker import TextChunker
-from .vector_database import VectorDatabase
-from .rag_system import RAGSystem
+import importlib
+
+# Submodule providing each public name
+_EXPORTS = {
+    'PDFLoader': 'pdf_loader',
+    'AudioTranscriber': 'audio_transcriber',
+    'TextChunker': 'text_chunker',
+    'VectorDatabase': 'vector_database',
+    'RAGSystem': 'rag_system',
+}
 
 __all__ = [
     'PDFLoader',
@@ -15,3 +23,16 @@ __all__ = [
     'VectorDatabase',
     'RAGSystem'
 ]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -5,6 +5,7 @@ Base classes and registry for agent tools.
 
 from typing import Dict, Any, List, Callable, Optional
 from abc import ABC, abstractmethod
+import asyncio
 import inspect
 
 
@@ -41,6 +42,15 @@ class Tool(ABC):
         """
         pass
     
+    async def aexecute(self, **kwargs) -> Dict[str, Any]:
+        """
+        Execute the tool asynchronously.
+        
+        Runs `execute` in a worker thread by default so blocking tools don't
+        stall the event loop. Override this for tools with native async I/O.
+        """
+        return await asyncio.to_thread(self.execute, **kwargs)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert tool to dictionary representation."""
         return {
@@ -108,6 +118,34 @@ class ToolRegistry:
                 "error": str(e),
                 "result": None
             }
+    
+    async def aexecute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
+        """
+        Execute a tool by name asynchronously.
+        
+        Args:
+            tool_name: Name of the tool to execute
+            **kwargs: Parameters for the tool
+            
+        Returns:
+            Tool execution result
+        """
+        tool = self.get_tool(tool_name)
+        if not tool:
+            return {
+                "success": False,
+                "error": f"Tool '{tool_name}' not found",
+                "result": None
+            }
+        
+        try:
+            return await tool.aexecute(**kwargs)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "result": None
+            }
 
 
 class RAGQueryTool(Tool):
@@ -3,23 +3,637 @@ Content Generation Tools
 Tools for creating various types of content (blog posts, PDFs, HTML, etc.)
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Callable, List, NamedTuple, Optional, Set, Tuple
 from modules.agent_tools import Tool
 from datetime import datetime
 from pathlib import Path
+import asyncio
+import contextvars
+import functools
 import json
+from operator import itemgetter
+import re
+import time
+from string import Template, ascii_letters, digits
 
+import httpx
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-class BlogPostGeneratorTool(Tool):
-    """Tool for generating blog posts from knowledge base topics."""
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    _REPORTLAB_AVAILABLE = True
+except ImportError:
+    _REPORTLAB_AVAILABLE = False
+
+try:
+    import cmarkgfm
+    _CMARKGFM_AVAILABLE = True
+except ImportError:
+    _CMARKGFM_AVAILABLE = False
+
+
+# Inline markdown tokens, matched left to right in a single scan. Code spans
+# come first so their contents are left alone; emphasis delimiters must not be
+# next to whitespace on the inside or to word characters on the outside.
+_INLINE_MARKDOWN = re.compile(
+    r'`(?P<code>.+?)`'
+    r'|\*\*(?P<bold>.+?)\*\*'
+    r'|__(?P<bold_under>.+?)__'
+    r'|(?<![\w*])\*(?![\s*])(?P<em>.+?)(?<![\s*])\*(?![\w*])'
+    r'|(?<![\w_])_(?![\s_])(?P<em_under>.+?)(?<![\s_])_(?![\w_])'
+    r'|\[(?P<link_text>.+?)\]\((?P<link_url>.+?)\)'
+)
+
+# Tags emitted for inline markdown: browser HTML and reportlab paragraph markup
+# (reportlab has no links, so they are kept as written)
+_INLINE_TAGS = {
+    "html": {
+        "bold": ("<strong>", "</strong>"),
+        "em": ("<em>", "</em>"),
+        "code": ("<code>", "</code>"),
+        "link": '<a href="{url}" target="_blank">{text}</a>'
+    },
+    "reportlab": {
+        "bold": ("<b>", "</b>"),
+        "em": ("<i>", "</i>"),
+        "code": ('<font name="Courier">', "</font>"),
+        "link": "[{text}]({url})"
+    }
+}
+_BULLET = re.compile(r'^[-*•]\s+')
+_NUM = re.compile(r'^\d+\.\s')
+_NUM_PREFIX = re.compile(r'^\d+\.\s+')
+
+# Connection pool shared by the provider SDK HTTP clients
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+
+
+def _is_transient_llm_error(exc: BaseException) -> bool:
+    """
+    Whether an LLM call failure is worth retrying.
+    
+    Rate limits, request timeouts and server errors are, judged by the HTTP
+    status the provider SDKs attach (`status_code`, or an integer `code` for
+    Gemini), as are timeouts and connection errors anywhere in the exception
+    chain. Anything else (bad request, auth, ...) fails immediately.
+    """
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        code = getattr(exc, 'code', None)
+        status = code if isinstance(code, int) else None
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError)):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+# Retry transient LLM failures: 3 attempts with exponential backoff
+_llm_retry = retry(
+    retry=retry_if_exception(_is_transient_llm_error),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.5),
+    reraise=True
+)
+
+# Set while a tool runs through its sync `execute`. The shared async clients keep
+# their connection pools bound to the agent's long-lived event loop, so such
+# runs make their LLM and RAG calls with the sync clients in worker threads
+_SYNC_EXECUTION = contextvars.ContextVar('_SYNC_EXECUTION', default=False)
+
+# Directory for saved outputs
+_OUTPUT_DIR = Path(__file__).resolve().parent.parent / "outputs"
+
+# Buffer sizes for saved outputs (text files and PDFs)
+_WRITE_BUFFER_SIZE = 65536
+_PDF_WRITE_BUFFER_SIZE = 262144
+
+# Characters kept in topic-derived filenames
+_SAFE_TOPIC_CHARS = frozenset(ascii_letters + digits + ' -_')
+_SAFE_TOPIC_TABLE = str.maketrans({c: None for c in map(chr, range(128)) if c not in _SAFE_TOPIC_CHARS})
+
+# Paragraph classification for the HTML formatter
+_HEADING_TAGS = {1: "h2", 2: "h2", 3: "h3", 4: "h4"}
+_BULLET_CHARS = frozenset('-*•')
+_BULLET_MARKERS = frozenset(('- ', '* ', '• '))
+
+
+def _safe_topic(topic: str) -> str:
+    """Reduce a topic to a filename-safe stem of at most 50 characters."""
+    if topic.isascii():
+        safe = topic.translate(_SAFE_TOPIC_TABLE)
+    else:
+        # Keep non-ASCII letters and digits, as isalnum() does
+        safe = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_'))
+    return safe.rstrip().replace(' ', '_')[:50]
+
+
+class _Timestamps(NamedTuple):
+    """Formatted forms of one point in time used in output files and footers."""
+    file: str
+    display: str
+    date: str
+
+
+@functools.lru_cache(maxsize=1)
+def _format_timestamps(epoch_second: int) -> _Timestamps:
+    """Format a second-resolution time once; repeated calls within the second hit the cache."""
+    now = datetime.fromtimestamp(epoch_second)
+    return _Timestamps(
+        file=now.strftime("%Y%m%d_%H%M%S"),
+        display=now.strftime("%Y-%m-%d %H:%M:%S"),
+        date=now.strftime('%B %d, %Y')
+    )
+
+
+def _timestamps() -> _Timestamps:
+    """Current time formatted for filenames, headers and footers."""
+    return _format_timestamps(int(time.time()))
+
+
+@functools.lru_cache(maxsize=1024)
+def _md_inline_to_html(text: str, target: str = "html") -> str:
+    """
+    Convert inline markdown (bold, italic, code, links) to tags in one pass.
+    
+    Args:
+        text: Markdown text
+        target: 'html' for web pages or 'reportlab' for PDF paragraphs
+    
+    Returns:
+        Text with inline markdown replaced by tags
+    """
+    tags = _INLINE_TAGS[target]
+    parts = []
+    pos = 0
+    
+    for match in _INLINE_MARKDOWN.finditer(text):
+        parts.append(text[pos:match.start()])
+        pos = match.end()
+        kind = match.lastgroup
+        
+        if kind == "code":
+            open_tag, close_tag = tags["code"]
+            parts.append(f"{open_tag}{match.group('code')}{close_tag}")
+        elif kind == "link_url":
+            inner = _md_inline_to_html(match.group('link_text'), target)
+            parts.append(tags["link"].format(text=inner, url=match.group('link_url')))
+        else:
+            # Emphasis may contain other inline markup
+            open_tag, close_tag = tags["bold" if kind.startswith("bold") else "em"]
+            parts.append(f"{open_tag}{_md_inline_to_html(match.group(kind), target)}{close_tag}")
+    
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _run_sync(coro) -> Any:
+    """Run a tool coroutine to completion from sync code, without the async clients."""
+    token = _SYNC_EXECUTION.set(True)
+    try:
+        return asyncio.run(coro)
+    finally:
+        _SYNC_EXECUTION.reset(token)
+
+
+@functools.lru_cache(maxsize=None)
+def _gemini_generation_config_cls():
+    """Import google.generativeai once and return its GenerationConfig class."""
+    import google.generativeai as genai
+    return genai.types.GenerationConfig
+
+
+async def _afetch_rag_result(rag_system, topic: str, query_template: str, n_results: int, max_tokens: Optional[int] = None) -> Dict:
+    """Answer a templated topic query through the RAG system's answer cache."""
+    if _SYNC_EXECUTION.get():
+        return await asyncio.to_thread(rag_system.answer_topic, topic, query_template, n_results, max_tokens)
+    return await rag_system.aanswer_topic(topic, query_template, n_results, max_tokens)
+
+
+async def _afetch_topic_context(rag_system, topic: str, query_template: str, n_results: int, max_tokens: Optional[int] = None) -> Dict:
+    """Answer a RAG query only when the knowledge base covers the topic; otherwise return {}."""
+    if not await asyncio.to_thread(rag_system.topic_is_covered, topic):
+        return {}
+    return await _afetch_rag_result(rag_system, topic, query_template, n_results, max_tokens=max_tokens)
+
+
+async def afetch_shared_context(rag_system, topic: str) -> Dict:
+    """
+    Retrieve RAG context for a topic once so several content tools can share it.
+    
+    Only the retrieved chunks are shared; tools that build on a RAG answer (the
+    HTML page) generate it themselves with their own prompt and token budget.
+    Pass the result to each tool's `rag_context` argument.
+    
+    Args:
+        rag_system: RAG system to query
+        topic: Topic shared by the tools
+    
+    Returns:
+        Dictionary with the retrieved 'context', or {} if the topic is not covered
+    """
+    if not await asyncio.to_thread(rag_system.topic_is_covered, topic):
+        return {}
+    chunks = await asyncio.to_thread(
+        rag_system.retrieve_context,
+        f"Provide comprehensive information about {topic}",
+        10
+    )
+    return {'context': chunks}
+
+
+class LLMProxy:
+    """
+    Single entry point for the content tools' LLM calls.
     
-    def __init__(self, llm_client, llm_provider: str, model_name: str, rag_system=None):
+    Wraps the sync and async provider clients, retries failed requests with
+    exponential backoff and offers streaming and multi-completion requests.
+    """
+    
+    def __init__(self, llm_client, llm_provider: str, model_name: str, async_llm_client=None):
+        """
+        Initialize the LLM proxy.
+        
+        Args:
+            llm_client: Sync LLM client
+            llm_provider: 'openai', 'anthropic', or 'gemini'
+            model_name: Model name
+            async_llm_client: Async LLM client (optional)
+        """
+        if llm_provider not in ("openai", "anthropic", "gemini"):
+            raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+        
         self.llm_client = llm_client
         self.llm_provider = llm_provider
         self.model_name = model_name
-        self.rag_system = rag_system
+        self.async_llm_client = async_llm_client
+        self._gen_cfg_cls = _gemini_generation_config_cls() if llm_provider == "gemini" else None
     
     @property
+    def async_available(self) -> bool:
+        """Whether calls may use the async client (not inside a sync tool execution)."""
+        return self.async_llm_client is not None and not _SYNC_EXECUTION.get()
+    
+    @staticmethod
+    def pooled_http_client() -> httpx.Client:
+        """HTTP client with a keep-alive connection pool for the sync provider SDKs."""
+        return httpx.Client(limits=_HTTP_LIMITS)
+    
+    @staticmethod
+    def pooled_async_http_client() -> httpx.AsyncClient:
+        """HTTP client with a keep-alive connection pool for the async provider SDKs."""
+        return httpx.AsyncClient(limits=_HTTP_LIMITS)
+    
+    @_llm_retry
+    def call(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
+        """
+        Request a single completion.
+        
+        Args:
+            system_prompt: System prompt
+            user_message: User message
+            max_tokens: Maximum tokens in the response
+            
+        Returns:
+            Generated text
+        """
+        if self.llm_provider == "openai":
+            response = self.llm_client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+                max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+        
+        elif self.llm_provider == "anthropic":
+            response = self.llm_client.messages.create(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_message}
+                ]
+            )
+            return response.content[0].text
+        
+        elif self.llm_provider == "gemini":
+            full_prompt = f"{system_prompt}\n\n{user_message}"
+            response = self.llm_client.generate_content(
+                full_prompt,
+                generation_config=self._gen_cfg_cls(
+                    temperature=0.7,
+                    max_output_tokens=max_tokens,
+                )
+            )
+            return response.text
+    
+    async def acall(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
+        """Request a single completion without blocking the event loop."""
+        texts = await self.acall_n(system_prompt, user_message, max_tokens, n=1)
+        return texts[0]
+    
+    async def acall_n(self, system_prompt: str, user_message: str, max_tokens: int = 2000, n: int = 1) -> List[str]:
+        """
+        Request `n` completions for one prompt without blocking the event loop.
+        
+        Args:
+            system_prompt: System prompt
+            user_message: User message
+            max_tokens: Maximum tokens in each response
+            n: Number of completions
+            
+        Returns:
+            List of generated texts
+        """
+        if not self.async_available:
+            return list(await asyncio.gather(*(
+                asyncio.to_thread(self.call, system_prompt, user_message, max_tokens)
+                for _ in range(n)
+            )))
+        
+        if self.llm_provider == "openai":
+            return await self._acomplete(system_prompt, user_message, max_tokens, n)
+        
+        # Anthropic and Gemini have no `n`; issue the copies concurrently
+        results = await asyncio.gather(*(
+            self._acomplete(system_prompt, user_message, max_tokens, 1)
+            for _ in range(n)
+        ))
+        return [texts[0] for texts in results]
+    
+    @_llm_retry
+    async def _acomplete(self, system_prompt: str, user_message: str, max_tokens: int, n: int) -> List[str]:
+        """Send one request over the async client (`n` > 1 is OpenAI only)."""
+        if self.llm_provider == "openai":
+            response = await self.async_llm_client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                n=n
+            )
+            return [choice.message.content for choice in response.choices]
+        
+        elif self.llm_provider == "anthropic":
+            response = await self.async_llm_client.messages.create(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_message}
+                ]
+            )
+            return [response.content[0].text]
+        
+        elif self.llm_provider == "gemini":
+            full_prompt = f"{system_prompt}\n\n{user_message}"
+            response = await self.async_llm_client.generate_content_async(
+                full_prompt,
+                generation_config=self._gen_cfg_cls(
+                    temperature=0.7,
+                    max_output_tokens=max_tokens,
+                )
+            )
+            return [response.text]
+    
+    async def astream(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> AsyncIterator[str]:
+        """Yield response text from the provider's streaming API as it arrives."""
+        if self.llm_provider == "openai":
+            stream = await self.async_llm_client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        
+        elif self.llm_provider == "anthropic":
+            async with self.async_llm_client.messages.stream(
+                model=self.model_name,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_message}
+                ]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        
+        elif self.llm_provider == "gemini":
+            full_prompt = f"{system_prompt}\n\n{user_message}"
+            response = await self.async_llm_client.generate_content_async(
+                full_prompt,
+                generation_config=self._gen_cfg_cls(
+                    temperature=0.7,
+                    max_output_tokens=max_tokens,
+                ),
+                stream=True
+            )
+            async for chunk in response:
+                yield chunk.text
+
+
+async def _astream_llm_to_file(llm_proxy: LLMProxy, system_prompt: str, user_message: str,
+                               filepath: Path, header: str = "", max_tokens: int = 2000) -> Tuple[str, int]:
+    """
+    Stream an LLM response straight into a file.
+    
+    Returns:
+        Tuple of (full response text, word count)
+    """
+    parts = []
+    word_count = 0
+    in_word = False
+    
+    # Pieces are collected in memory and written in large blocks from a worker
+    # thread, so file I/O never blocks the event loop
+    buffer = bytearray(header.encode('utf-8'))
+    f = await asyncio.to_thread(open, filepath, 'wb')
+    try:
+        async for piece in llm_proxy.astream(system_prompt, user_message, max_tokens):
+            if not piece:
+                continue
+            buffer += piece.encode('utf-8')
+            parts.append(piece)
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                await asyncio.to_thread(f.write, bytes(buffer))
+                buffer.clear()
+            
+            # A word split across pieces is only counted once
+            words = len(piece.split())
+            if in_word and not piece[0].isspace():
+                words -= 1
+            word_count += words
+            in_word = not piece[-1].isspace()
+        
+        if buffer:
+            await asyncio.to_thread(f.write, bytes(buffer))
+    finally:
+        await asyncio.to_thread(f.close)
+    
+    return "".join(parts), word_count
+
+
+class ContentBatchExecutor:
+    """
+    Coalesces content-generation LLM requests submitted within a short window.
+    
+    Requests with identical prompts are sent as a single API call (OpenAI's `n`
+    parameter returns one choice per caller). Distinct prompts collected in the
+    same window are dispatched concurrently over the shared async client.
+    """
+    
+    def __init__(self, llm_proxy: LLMProxy, window_seconds: float = 0.05):
+        """
+        Initialize the batch executor.
+        
+        Args:
+            llm_proxy: LLM proxy shared by the content tools
+            window_seconds: How long to collect requests before flushing
+        """
+        self.llm_proxy = llm_proxy
+        self.window_seconds = window_seconds
+        # Pending requests per event loop: [((system_prompt, user_message, max_tokens), future), ...]
+        self._pending: Dict[asyncio.AbstractEventLoop, List[Tuple[Tuple[str, str, int], asyncio.Future]]] = {}
+        # The event loop only keeps weak references to tasks, so running flushes are held here
+        self._flush_tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
+        """
+        Queue a request for the next flush and wait for its completion text.
+        
+        Args:
+            system_prompt: System prompt
+            user_message: User message
+            max_tokens: Maximum tokens in the response
+            
+        Returns:
+            Generated text
+        """
+        if not self.llm_proxy.async_available:
+            # Sync tool executions run on a short-lived loop; nothing to coalesce with
+            return await self.llm_proxy.acall(system_prompt, user_message, max_tokens)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        batch = self._pending.get(loop)
+        if batch is None:
+            batch = self._pending[loop] = []
+            loop.call_later(self.window_seconds, self._start_flush, loop)
+        batch.append(((system_prompt, user_message, max_tokens), future))
+        
+        return await future
+    
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        """Start flushing a loop's pending requests, keeping the task referenced until done."""
+        task = loop.create_task(self._flush(loop))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush(self, loop: asyncio.AbstractEventLoop):
+        """Send all requests collected for a loop, one API call per distinct prompt."""
+        batch = self._pending.pop(loop, [])
+        
+        groups: Dict[Tuple[str, str, int], List[asyncio.Future]] = {}
+        for request, future in batch:
+            groups.setdefault(request, []).append(future)
+        
+        await asyncio.gather(*(
+            self._complete_group(request, futures)
+            for request, futures in groups.items()
+        ))
+    
+    async def _complete_group(self, request: Tuple[str, str, int], futures: List[asyncio.Future]):
+        """Complete one distinct prompt and hand a result to each waiting caller."""
+        try:
+            texts = await self.llm_proxy.acall_n(*request, n=len(futures))
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for future, text in zip(futures, texts):
+            if not future.done():
+                future.set_result(text)
+
+
+class _ContentTool(Tool):
+    """
+    Shared setup for the LLM-backed content tools.
+    
+    Complete (non-streamed) generations go through `_acall_llm`, which submits
+    them to the batch executor so identical prompts issued concurrently share
+    one API call. Tools that save to a file stream the response instead when an
+    async client is available, trading coalescing for earlier output; batching
+    therefore applies to `save_to_file=False` calls and to content that is not
+    streamed at all.
+    """
+    
+    def __init__(self, llm_proxy: LLMProxy, rag_system=None, batch_executor=None):
+        self.llm_proxy = llm_proxy
+        self.rag_system = rag_system
+        if batch_executor is None and llm_proxy.async_llm_client is not None:
+            batch_executor = ContentBatchExecutor(llm_proxy)
+        self._batch_executor = batch_executor
+        self._output_dir = _OUTPUT_DIR
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+    
+    async def _acall_llm(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
+        """Call the LLM through the batch executor when one is available."""
+        if self._batch_executor is None:
+            return await self.llm_proxy.acall(system_prompt, user_message, max_tokens)
+        return await self._batch_executor.submit(system_prompt, user_message, max_tokens)
+
+
+class BlogPostGeneratorTool(_ContentTool):
+    """Tool for generating blog posts from knowledge base topics."""
+    
+    # Target word counts per length
+    _WORD_COUNTS = {
+        "short": "300-400",
+        "medium": "600-800",
+        "long": "1000-1500"
+    }
+    
+    # Style-specific instructions
+    _STYLE_INSTRUCTIONS = {
+        "professional": "Use a professional, authoritative tone suitable for a business blog.",
+        "casual": "Use a conversational, friendly tone as if talking to a friend.",
+        "technical": "Use technical language and precise terminology for a technical audience.",
+        "social_media": "Use engaging, concise language with emojis, hashtags at the end. Keep it punchy and shareable."
+    }
+    
+    _VALID_STYLES = frozenset(_STYLE_INSTRUCTIONS)
+    _VALID_LENGTHS = frozenset(_WORD_COUNTS)
+    
+
     def name(self) -> str:
         return "generate_blog_post"
     
@@ -36,52 +650,35 @@ class BlogPostGeneratorTool(Tool):
             "save_to_file": "bool - Whether to save to a file (default: True)"
         }
     
-    def execute(self, topic: str, style: str = "professional", length: str = "medium", save_to_file: bool = True, **kwargs) -> Dict[str, Any]:
+    def execute(self, topic: str, style: str = "professional", length: str = "medium", save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
         """Generate blog post."""
+        return _run_sync(self.aexecute(topic, style=style, length=length, save_to_file=save_to_file, rag_context=rag_context, **kwargs))
+    
+    async def aexecute(self, topic: str, style: str = "professional", length: str = "medium", save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Generate blog post without blocking the event loop."""
         try:
-            # Get relevant information from RAG if available
-            context = ""
-            if self.rag_system:
-                rag_result = self.rag_system.answer_question(
-                    f"Provide comprehensive information about {topic}",
-                    n_results=7,
-                    return_context=True
-                )
-                context = "\n".join([ctx['text'] for ctx in rag_result.get('context', [])])
+            # Unknown values fall back to the defaults once, before any lookup
+            style = style if style in self._VALID_STYLES else "professional"
+            length = length if length in self._VALID_LENGTHS else "medium"
             
-            # Define word counts
-            word_counts = {
-                "short": "300-400",
-                "medium": "600-800",
-                "long": "1000-1500"
-            }
-            target_words = word_counts.get(length, "600-800")
+            # Start fetching relevant information from RAG while the prompt is prepared
+            context_task = None
+            if rag_context is None and self.rag_system:
+                context_task = asyncio.create_task(_afetch_topic_context(
+                    self.rag_system,
+                    topic,
+                    "Provide comprehensive information about {topic}",
+                    n_results=7
+                ))
             
-            # Style-specific instructions
-            style_instructions = {
-                "professional": "Use a professional, authoritative tone suitable for a business blog.",
-                "casual": "Use a conversational, friendly tone as if talking to a friend.",
-                "technical": "Use technical language and precise terminology for a technical audience.",
-                "social_media": "Use engaging, concise language with emojis, hashtags at the end. Keep it punchy and shareable."
-            }
-            style_instruction = style_instructions.get(style, style_instructions["professional"])
+            system_prompt = self._build_system_prompt(style, length)
+            
+            context = ""
+            if context_task is not None:
+                rag_context = await context_task
+            if rag_context:
+                context = "\n".join(map(itemgetter('text'), rag_context.get('context', ())))
             
-            system_prompt = f"""You are a professional content writer and educator.
-Create engaging, informative content based on the provided information.
-{style_instruction}
-Target length: {target_words} words.
-
-For social media posts:
-- Include attention-grabbing opening
-- Use short paragraphs
-- Add 3-5 relevant hashtags at the end
-
-For blog posts:
-- Include a compelling title
-- Start with a hook
-- Use clear section headings
-- Include a conclusion/call-to-action"""
-
             user_message = f"""Topic: {topic}
 
 Context Information:
@@ -89,19 +686,28 @@ Context Information:
 
 Please create {length} {style} content about this topic."""
 
-            response_text = self._call_llm(system_prompt, user_message, max_tokens=2000)
-            
-            # Save to file if requested
             filepath = None
-            if save_to_file:
-                filepath = self._save_content(response_text, topic, "blog_post", style)
+            if save_to_file and self.llm_proxy.async_available:
+                # Write tokens to the file as they arrive instead of after the full response
+                filepath = self._output_path(topic, "blog_post", style)
+                response_text, word_count = await _astream_llm_to_file(
+                    self.llm_proxy, system_prompt, user_message, filepath,
+                    header=self._content_header(topic, style), max_tokens=2000
+                )
+            else:
+                response_text = await self._acall_llm(system_prompt, user_message, max_tokens=2000)
+                word_count = len(response_text.split())
+                
+                # Save to file if requested
+                if save_to_file:
+                    filepath = await asyncio.to_thread(self._save_content, response_text, topic, "blog_post", style)
             
             return {
                 "success": True,
                 "result": {
                     "content": response_text,
                     "filepath": str(filepath) if filepath else None,
-                    "word_count": len(response_text.split()),
+                    "word_count": word_count,
                     "style": style,
                     "topic": topic
                 },
@@ -114,76 +720,61 @@ Please create {length} {style} content about this topic."""
                 "error": str(e)
             }
     
-    def _call_llm(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
-        """Call the LLM."""
-        if self.llm_provider == "openai":
-            response = self.llm_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _build_system_prompt(style: str, length: str) -> str:
+        """Build the system prompt for a validated style and length (cached, it depends on nothing else)."""
+        target_words = BlogPostGeneratorTool._WORD_COUNTS[length]
+        style_instruction = BlogPostGeneratorTool._STYLE_INSTRUCTIONS[style]
         
-        elif self.llm_provider == "anthropic":
-            response = self.llm_client.messages.create(
-                model=self.model_name,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_message}
-                ]
-            )
-            return response.content[0].text
+        return f"""You are a professional content writer and educator.
+Create engaging, informative content based on the provided information.
+{style_instruction}
+Target length: {target_words} words.
+
+For social media posts:
+- Include attention-grabbing opening
+- Use short paragraphs
+- Add 3-5 relevant hashtags at the end
+
+For blog posts:
+- Include a compelling title
+- Start with a hook
+- Use clear section headings
+- Include a conclusion/call-to-action"""
+    
+    def _output_path(self, topic: str, content_type: str, style: str) -> Path:
+        """Build the output file path for a piece of content."""
+        timestamp = _timestamps().file
+        safe_topic = _safe_topic(topic)
         
-        elif self.llm_provider == "gemini":
-            import google.generativeai as genai
-            full_prompt = f"{system_prompt}\n\n{user_message}"
-            response = self.llm_client.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=max_tokens,
-                )
-            )
-            return response.text
+        filename = f"{content_type}_{style}_{safe_topic}_{timestamp}.txt"
+        return self._output_dir / filename
+    
+    def _content_header(self, topic: str, style: str) -> str:
+        """Header written above the content in saved files."""
+        return (
+            f"Generated: {_timestamps().display}\n"
+            f"Topic: {topic}\n"
+            f"Style: {style}\n"
+            + "="*80 + "\n\n"
+        )
     
     def _save_content(self, content: str, topic: str, content_type: str, style: str) -> Path:
         """Save content to file."""
-        output_dir = Path(__file__).parent.parent / "outputs"
-        output_dir.mkdir(exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_topic = safe_topic.replace(' ', '_')[:50]
-        
-        filename = f"{content_type}_{style}_{safe_topic}_{timestamp}.txt"
-        filepath = output_dir / filename
+        filepath = self._output_path(topic, content_type, style)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Topic: {topic}\n")
-            f.write(f"Style: {style}\n")
-            f.write("="*80 + "\n\n")
-            f.write(content)
+        with open(filepath, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(self._content_header(topic, style).encode('utf-8'))
+            f.write(content.encode('utf-8'))
         
         return filepath
 
 
-class NewsletterGeneratorTool(Tool):
+class NewsletterGeneratorTool(_ContentTool):
     """Tool for generating newsletter-style content."""
     
-    def __init__(self, llm_client, llm_provider: str, model_name: str, rag_system=None):
-        self.llm_client = llm_client
-        self.llm_provider = llm_provider
-        self.model_name = model_name
-        self.rag_system = rag_system
-    
-    @property
+
     def name(self) -> str:
         return "generate_newsletter"
     
@@ -199,18 +790,22 @@ class NewsletterGeneratorTool(Tool):
             "save_to_file": "bool - Whether to save to file (default: True)"
         }
     
-    def execute(self, topic: str, sections: int = 3, save_to_file: bool = True, **kwargs) -> Dict[str, Any]:
+    def execute(self, topic: str, sections: int = 3, save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
         """Generate newsletter."""
+        return _run_sync(self.aexecute(topic, sections=sections, save_to_file=save_to_file, rag_context=rag_context, **kwargs))
+    
+    async def aexecute(self, topic: str, sections: int = 3, save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Generate newsletter without blocking the event loop."""
         try:
-            # Get relevant information
-            context = ""
-            if self.rag_system:
-                rag_result = self.rag_system.answer_question(
-                    f"Provide comprehensive information about {topic} suitable for a newsletter",
-                    n_results=7,
-                    return_context=True
-                )
-                context = "\n".join([ctx['text'] for ctx in rag_result.get('context', [])])
+            # Start fetching relevant information while the prompt is prepared
+            context_task = None
+            if rag_context is None and self.rag_system:
+                context_task = asyncio.create_task(_afetch_topic_context(
+                    self.rag_system,
+                    topic,
+                    "Provide comprehensive information about {topic} suitable for a newsletter",
+                    n_results=7
+                ))
             
             system_prompt = """You are a professional newsletter writer.
 Create an engaging, informative newsletter with:
@@ -223,6 +818,12 @@ Create an engaging, informative newsletter with:
 
 Format the newsletter ready for email distribution."""
 
+            context = ""
+            if context_task is not None:
+                rag_context = await context_task
+            if rag_context:
+                context = "\n".join(map(itemgetter('text'), rag_context.get('context', ())))
+            
             user_message = f"""Topic: {topic}
 Number of sections: {sections}
 
@@ -231,23 +832,19 @@ Context Information:
 
 Create a newsletter about this topic."""
 
-            response_text = self._call_llm(system_prompt, user_message)
-            
-            # Save to file
             filepath = None
-            if save_to_file:
-                output_dir = Path(__file__).parent.parent / "outputs"
-                output_dir.mkdir(exist_ok=True)
-                
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_topic = safe_topic.replace(' ', '_')[:50]
-                
-                filename = f"newsletter_{safe_topic}_{timestamp}.txt"
-                filepath = output_dir / filename
+            if save_to_file and self.llm_proxy.async_available:
+                # Write tokens to the file as they arrive instead of after the full response
+                filepath = self._output_path(topic)
+                response_text, _ = await _astream_llm_to_file(
+                    self.llm_proxy, system_prompt, user_message, filepath
+                )
+            else:
+                response_text = await self._acall_llm(system_prompt, user_message)
                 
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(response_text)
+                # Save to file
+                if save_to_file:
+                    filepath = await asyncio.to_thread(self._save_content, response_text, topic)
             
             return {
                 "success": True,
@@ -265,98 +862,33 @@ Create a newsletter about this topic."""
                 "error": str(e)
             }
     
-    def _call_llm(self, system_prompt: str, user_message: str, max_tokens: int = 2000) -> str:
-        """Call the LLM."""
-        if self.llm_provider == "openai":
-            response = self.llm_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+    def _output_path(self, topic: str) -> Path:
+        """Build the output file path for a newsletter."""
+        timestamp = _timestamps().file
+        safe_topic = _safe_topic(topic)
         
-        elif self.llm_provider == "anthropic":
-            response = self.llm_client.messages.create(
-                model=self.model_name,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_message}
-                ]
-            )
-            return response.content[0].text
+        filename = f"newsletter_{safe_topic}_{timestamp}.txt"
+        return self._output_dir / filename
+    
+    def _save_content(self, content: str, topic: str) -> Path:
+        """Save newsletter to file."""
+        filepath = self._output_path(topic)
         
-        elif self.llm_provider == "gemini":
-            import google.generativeai as genai
-            full_prompt = f"{system_prompt}\n\n{user_message}"
-            response = self.llm_client.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=max_tokens,
-                )
-            )
-            return response.text
+        with open(filepath, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(content.encode('utf-8'))
+        
+        return filepath
 
 
-class HTMLGeneratorTool(Tool):
-    """Tool for generating simple HTML pages."""
-    
-    def __init__(self, llm_client, llm_provider: str, model_name: str, rag_system=None):
-        self.llm_client = llm_client
-        self.llm_provider = llm_provider
-        self.model_name = model_name
-        self.rag_system = rag_system
-    
-    @property
-    def name(self) -> str:
-        return "generate_html"
-    
-    @property
-    def description(self) -> str:
-        return "Generate a simple, attractive HTML page about a topic."
-    
-    @property
-    def parameters(self) -> Dict[str, Any]:
-        return {
-            "topic": "str - The topic for the HTML page",
-            "save_to_file": "bool - Whether to save to file (default: True)"
-        }
-    
-    def execute(self, topic: str, save_to_file: bool = True, **kwargs) -> Dict[str, Any]:
-        """Generate HTML page."""
-        try:
-            # Get content from RAG with increased token limit for comprehensive content
-            content = ""
-            if self.rag_system:
-                # Temporarily increase max_tokens for HTML generation
-                original_max_tokens = self.rag_system.max_tokens
-                self.rag_system.max_tokens = 3000  # Allow for comprehensive HTML content
-                
-                rag_result = self.rag_system.answer_question(
-                    f"Provide comprehensive, detailed information about {topic}. Include multiple sections with clear headings. Write at least 5-6 detailed paragraphs covering different aspects of the topic.",
-                    n_results=7,
-                    return_context=True
-                )
-                content = rag_result.get('answer', '')
-                
-                # Restore original max_tokens
-                self.rag_system.max_tokens = original_max_tokens
-            
-            # Create HTML template
-            html_content = f"""<!DOCTYPE html>
+# Static page skeleton for HTMLGeneratorTool; only the topic and date vary
+_HTML_PREFIX_TEMPLATE = Template("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{topic}</title>
+    <title>$topic</title>
     <style>
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
             max-width: 800px;
@@ -364,105 +896,153 @@ class HTMLGeneratorTool(Tool):
             padding: 20px;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: #333;
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             padding: 40px;
             border-radius: 10px;
             box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #667eea;
             border-bottom: 3px solid #667eea;
             padding-bottom: 10px;
-        }}
-        h2 {{
+        }
+        h2 {
             color: #764ba2;
             margin-top: 30px;
-        }}
-        h3 {{
+        }
+        h3 {
             color: #667eea;
             margin-top: 25px;
             font-size: 1.3em;
-        }}
-        h4 {{
+        }
+        h4 {
             color: #764ba2;
             margin-top: 20px;
             font-size: 1.1em;
-        }}
-        p {{
+        }
+        p {
             text-align: justify;
             margin: 15px 0;
-        }}
-        ul, ol {{
+        }
+        ul, ol {
             margin: 15px 0;
             padding-left: 30px;
-        }}
-        li {{
+        }
+        li {
             margin: 8px 0;
             line-height: 1.6;
-        }}
-        strong {{
+        }
+        strong {
             color: #333;
             font-weight: 600;
-        }}
-        em {{
+        }
+        em {
             color: #555;
             font-style: italic;
-        }}
-        code {{
+        }
+        code {
             background-color: #f4f4f4;
             padding: 2px 6px;
             border-radius: 3px;
             font-family: 'Courier New', monospace;
             font-size: 0.9em;
             color: #d63384;
-        }}
-        a {{
+        }
+        a {
             color: #667eea;
             text-decoration: none;
             border-bottom: 1px solid #667eea;
-        }}
-        a:hover {{
+        }
+        a:hover {
             color: #764ba2;
             border-bottom-color: #764ba2;
-        }}
-        .footer {{
+        }
+        .footer {
             margin-top: 40px;
             padding-top: 20px;
             border-top: 1px solid #ddd;
             text-align: center;
             color: #666;
             font-size: 0.9em;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
-        <h1>{topic}</h1>
-        {self._format_content_as_html(content)}
+        <h1>$topic</h1>
+        """)
+_HTML_FOOTER_TEMPLATE = Template("""
         <div class="footer">
-            <p>Generated by AI Educational Assistant | {datetime.now().strftime('%B %d, %Y')}</p>
+            <p>Generated by AI Educational Assistant | $date</p>
         </div>
     </div>
 </body>
-</html>"""
+</html>""")
+
+
+class HTMLGeneratorTool(_ContentTool):
+    """Tool for generating simple HTML pages."""
+    
+    # RAG query for the page body, with an increased token limit for comprehensive content
+    _RAG_QUERY = (
+        "Provide comprehensive, detailed information about {topic}. Include multiple sections "
+        "with clear headings. Write at least 5-6 detailed paragraphs covering different aspects of the topic."
+    )
+    _RAG_MAX_TOKENS = 3000
+    
+
+    def name(self) -> str:
+        return "generate_html"
+    
+    @property
+    def description(self) -> str:
+        return "Generate a simple, attractive HTML page about a topic."
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "topic": "str - The topic for the HTML page",
+            "save_to_file": "bool - Whether to save to file (default: True)"
+        }
+    
+    def execute(self, topic: str, save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Generate HTML page."""
+        return _run_sync(self.aexecute(topic, save_to_file=save_to_file, rag_context=rag_context, **kwargs))
+    
+    async def aexecute(self, topic: str, save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Generate HTML page without blocking the event loop."""
+        try:
+            # Get content from RAG. The page body is the answer itself, so it is fetched
+            # even for topics the knowledge base does not cover; the LLM then answers on its own
+            content = ""
+            if rag_context is None and self.rag_system:
+                rag_context = await _afetch_rag_result(
+                    self.rag_system,
+                    topic,
+                    self._RAG_QUERY,
+                    n_results=7,
+                    max_tokens=self._RAG_MAX_TOKENS
+                )
+            elif rag_context is not None and 'answer' not in rag_context and self.rag_system:
+                # Shared context carries only the retrieved chunks
+                rag_context = {'answer': await self._agenerate_answer(topic, rag_context.get('context', []))}
+            if rag_context:
+                content = rag_context.get('answer', '')
+            
+            # Fill the static page skeleton around the formatted content
+            html_parts = [
+                _HTML_PREFIX_TEMPLATE.substitute(topic=topic),
+                self._format_content_as_html(content),
+                _HTML_FOOTER_TEMPLATE.substitute(date=_timestamps().date)
+            ]
+            html_content = "".join(html_parts)
             
             # Save to file
             filepath = None
             if save_to_file:
-                output_dir = Path(__file__).parent.parent / "outputs"
-                output_dir.mkdir(exist_ok=True)
-                
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_topic = safe_topic.replace(' ', '_')[:50]
-                
-                filename = f"webpage_{safe_topic}_{timestamp}.html"
-                filepath = output_dir / filename
-                
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                filepath = await asyncio.to_thread(self._save_content, html_parts, topic)
             
             return {
                 "success": True,
@@ -480,117 +1060,154 @@ class HTMLGeneratorTool(Tool):
                 "error": str(e)
             }
     
+    async def _agenerate_answer(self, topic: str, chunks: List[Dict]) -> str:
+        """Write the page body from already retrieved chunks with the page's own RAG query."""
+        query = self._RAG_QUERY.replace("{topic}", topic)
+        context = self.rag_system.format_context(chunks)
+        if _SYNC_EXECUTION.get():
+            return await asyncio.to_thread(
+                self.rag_system.generate_answer, query, context, max_tokens=self._RAG_MAX_TOKENS
+            )
+        return await self.rag_system.agenerate_answer(query, context, max_tokens=self._RAG_MAX_TOKENS)
+    
+    def _save_content(self, html_parts: List[str], topic: str) -> Path:
+        """Save HTML page to file, writing the skeleton and body pieces in turn."""
+        timestamp = _timestamps().file
+        safe_topic = _safe_topic(topic)
+        
+        filename = f"webpage_{safe_topic}_{timestamp}.html"
+        filepath = self._output_dir / filename
+        
+        with open(filepath, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+            for part in html_parts:
+                f.write(part.encode('utf-8'))
+        
+        return filepath
+    
     def _format_content_as_html(self, content: str) -> str:
         """Convert markdown content to HTML."""
-        import re
+        # The compiled GFM parser is much faster and handles the full syntax
+        # (nested emphasis, code fences, tables); the walker below is the fallback
+        if _CMARKGFM_AVAILABLE:
+            return cmarkgfm.github_flavored_markdown_to_html(content)
         
         # Split by double newlines first, but also handle headings followed by single newlines
         paragraphs = content.split('\n\n')
         html_parts = []
+        append = html_parts.append
+        convert = self._convert_inline_markdown
         
         for para in paragraphs:
             para = para.strip()
             if not para:
                 continue
             
-            # Check for headings (must check longer patterns first)
+            first = para[0]
+            
+            # Headings: the number of leading '#' picks the tag
             # Extract only the first line as heading if it starts with #
-            if para.startswith('####'):
-                lines = para.split('\n', 1)
-                heading = lines[0].lstrip('#').strip()
-                heading = self._convert_inline_markdown(heading)
-                html_parts.append(f"<h4>{heading}</h4>")
+            if first == '#':
+                level = min(len(para) - len(para.lstrip('#')), 4)
+                tag = _HEADING_TAGS[level]
+                heading, _, remaining = para.partition('\n')
+                append(f"<{tag}>{convert(heading.lstrip('#').strip())}</{tag}>")
                 # If there's content after the heading, process it as a paragraph
-                if len(lines) > 1 and lines[1].strip():
-                    remaining = self._convert_inline_markdown(lines[1].strip())
-                    html_parts.append(f"<p>{remaining}</p>")
-            elif para.startswith('###'):
-                lines = para.split('\n', 1)
-                heading = lines[0].lstrip('#').strip()
-                heading = self._convert_inline_markdown(heading)
-                html_parts.append(f"<h3>{heading}</h3>")
-                if len(lines) > 1 and lines[1].strip():
-                    remaining = self._convert_inline_markdown(lines[1].strip())
-                    html_parts.append(f"<p>{remaining}</p>")
-            elif para.startswith('##'):
-                lines = para.split('\n', 1)
-                heading = lines[0].lstrip('#').strip()
-                heading = self._convert_inline_markdown(heading)
-                html_parts.append(f"<h2>{heading}</h2>")
-                if len(lines) > 1 and lines[1].strip():
-                    remaining = self._convert_inline_markdown(lines[1].strip())
-                    html_parts.append(f"<p>{remaining}</p>")
-            elif para.startswith('#'):
-                lines = para.split('\n', 1)
-                heading = lines[0].lstrip('#').strip()
-                heading = self._convert_inline_markdown(heading)
-                html_parts.append(f"<h2>{heading}</h2>")
-                if len(lines) > 1 and lines[1].strip():
-                    remaining = self._convert_inline_markdown(lines[1].strip())
-                    html_parts.append(f"<p>{remaining}</p>")
+                remaining = remaining.strip()
+                if remaining:
+                    append(f"<p>{convert(remaining)}</p>")
             # Check for bullet lists
-            elif para.startswith('- ') or para.startswith('* ') or para.startswith('• '):
+            elif first in _BULLET_CHARS and para[:2] in _BULLET_MARKERS:
                 # Handle multi-line bullet lists
-                list_items = []
-                lines = para.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('- ') or line.startswith('* ') or line.startswith('• '):
-                        item_text = re.sub(r'^[-*•]\s+', '', line)
-                        item_text = self._convert_inline_markdown(item_text)
-                        list_items.append(f"<li>{item_text}</li>")
+                list_items = [
+                    f"<li>{convert(_BULLET.sub('', line))}</li>"
+                    for line in map(str.strip, para.split('\n'))
+                    if line[:2] in _BULLET_MARKERS
+                ]
                 if list_items:
-                    items_html = '\n            '.join(list_items)
-                    html_parts.append(f"<ul>\n            {items_html}\n        </ul>")
+                    append("<ul>\n            " + '\n            '.join(list_items) + "\n        </ul>")
             # Check for numbered lists
-            elif re.match(r'^\d+\.\s', para):
-                list_items = []
-                lines = para.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if re.match(r'^\d+\.\s', line):
-                        item_text = re.sub(r'^\d+\.\s+', '', line)
-                        item_text = self._convert_inline_markdown(item_text)
-                        list_items.append(f"<li>{item_text}</li>")
+            elif first.isdigit() and _NUM.match(para):
+                list_items = [
+                    f"<li>{convert(_NUM_PREFIX.sub('', line))}</li>"
+                    for line in map(str.strip, para.split('\n'))
+                    if _NUM.match(line)
+                ]
                 if list_items:
-                    items_html = '\n            '.join(list_items)
-                    html_parts.append(f"<ol>\n            {items_html}\n        </ol>")
+                    append("<ol>\n            " + '\n            '.join(list_items) + "\n        </ol>")
             # Regular paragraph
             else:
-                para = self._convert_inline_markdown(para)
-                html_parts.append(f"<p>{para}</p>")
+                append(f"<p>{convert(para)}</p>")
         
         return '\n        '.join(html_parts)
     
     def _convert_inline_markdown(self, text: str) -> str:
         """Convert inline markdown formatting to HTML."""
-        import re
+        return _md_inline_to_html(text, "html")
+
+
+class PDFGeneratorTool(_ContentTool):
+    """Tool for generating PDF documents/reports."""
+    
+    # Style-specific instructions
+    _STYLE_INSTRUCTIONS = {
+        "report": "Create a professional report with an executive summary, detailed sections, and conclusions.",
+        "guide": "Create a practical guide with step-by-step instructions and best practices.",
+        "tutorial": "Create an educational tutorial with clear explanations and examples.",
+        "whitepaper": "Create a comprehensive whitepaper with technical depth and research-backed insights."
+    }
+    
+    def __init__(self, llm_proxy: LLMProxy, rag_system=None, batch_executor=None, content_cache=None):
+        super().__init__(llm_proxy, rag_system, batch_executor)
+        self._content_cache = content_cache
+        if _REPORTLAB_AVAILABLE:
+            self._build_styles()
+    
+    def _build_styles(self):
+        """Create the paragraph styles once; they are reused by every document."""
+        styles = getSampleStyleSheet()
         
-        # Bold: **text** or __text__
-        text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
-        text = re.sub(r'__(.+?)__', r'<strong>\1</strong>', text)
+        self._title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor='#1a1a1a',
+            spaceAfter=30,
+            alignment=TA_CENTER
+        )
         
-        # Italic: *text* or _text_ (but not in middle of words)
-        text = re.sub(r'(?<!\w)\*(.+?)\*(?!\w)', r'<em>\1</em>', text)
-        text = re.sub(r'(?<!\w)_(.+?)_(?!\w)', r'<em>\1</em>', text)
+        self._heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor='#2c3e50',
+            spaceAfter=12,
+            spaceBefore=12
+        )
         
-        # Inline code: `code`
-        text = re.sub(r'`(.+?)`', r'<code>\1</code>', text)
+        self._subheading_style = ParagraphStyle(
+            'CustomSubHeading',
+            parent=styles['Heading3'],
+            fontSize=13,
+            textColor='#34495e',
+            spaceAfter=10,
+            spaceBefore=10
+        )
         
-        # Links: [text](url)
-        text = re.sub(r'\[(.+?)\]\((.+?)\)', r'<a href="\2" target="_blank">\1</a>', text)
+        self._body_style = ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontSize=11,
+            alignment=TA_JUSTIFY,
+            spaceAfter=12
+        )
         
-        return text
-
-
-class PDFGeneratorTool(Tool):
-    """Tool for generating PDF documents/reports."""
-    
-    def __init__(self, llm_client, llm_provider: str, model_name: str, rag_system=None):
-        self.llm_client = llm_client
-        self.llm_provider = llm_provider
-        self.model_name = model_name
-        self.rag_system = rag_system
+        self._footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor='#666666',
+            alignment=TA_CENTER
+        )
     
     @property
     def name(self) -> str:
@@ -608,17 +1225,14 @@ class PDFGeneratorTool(Tool):
             "save_to_file": "bool - Whether to save to file (default: True)"
         }
     
-    def execute(self, topic: str, style: str = "report", save_to_file: bool = True, **kwargs) -> Dict[str, Any]:
+    def execute(self, topic: str, style: str = "report", save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
         """Generate PDF document."""
+        return _run_sync(self.aexecute(topic, style=style, save_to_file=save_to_file, rag_context=rag_context, **kwargs))
+    
+    async def aexecute(self, topic: str, style: str = "report", save_to_file: bool = True, rag_context: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """Generate PDF document without blocking the event loop."""
         try:
-            # Import PDF library
-            try:
-                from reportlab.lib.pagesizes import letter
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.units import inch
-                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-                from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-            except ImportError:
+            if not _REPORTLAB_AVAILABLE:
                 return {
                     "success": False,
                     "result": None,
@@ -626,121 +1240,65 @@ class PDFGeneratorTool(Tool):
                 }
             
             # Get relevant information from RAG if available
-            context = ""
-            if self.rag_system:
-                rag_result = self.rag_system.answer_question(
-                    f"Provide comprehensive information about {topic}",
-                    n_results=10,
-                    return_context=True
-                )
-                context = "\n".join([ctx['text'] for ctx in rag_result.get('context', [])])
+            context_task = None
+            if rag_context is None and self.rag_system:
+                context_task = asyncio.create_task(_afetch_topic_context(
+                    self.rag_system,
+                    topic,
+                    "Provide comprehensive information about {topic}",
+                    n_results=10
+                ))
             
-            # Generate content based on style
-            content = self._generate_pdf_content(topic, style, context)
+            context = ""
+            if context_task is not None:
+                rag_context = await context_task
+            if rag_context:
+                context = "\n".join(map(itemgetter('text'), rag_context.get('context', ())))
             
             if not save_to_file:
+                # Generate content based on style
+                content = await self._agenerate_pdf_content(topic, style, context)
                 return {
                     "success": True,
                     "result": {"content": content},
                     "error": None
                 }
             
-            # Create PDF
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{topic.lower().replace(' ', '_')}_{timestamp}.pdf"
-            filepath = Path("outputs") / filename
-            filepath.parent.mkdir(exist_ok=True)
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(str(filepath), pagesize=letter,
-                                   topMargin=1*inch, bottomMargin=0.75*inch,
-                                   leftMargin=1*inch, rightMargin=1*inch)
-            
             # Container for content
             story = []
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor='#1a1a1a',
-                spaceAfter=30,
-                alignment=TA_CENTER
-            )
             
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor='#2c3e50',
-                spaceAfter=12,
-                spaceBefore=12
-            )
-            
-            subheading_style = ParagraphStyle(
-                'CustomSubHeading',
-                parent=styles['Heading3'],
-                fontSize=13,
-                textColor='#34495e',
-                spaceAfter=10,
-                spaceBefore=10
-            )
-            
-            body_style = ParagraphStyle(
-                'CustomBody',
-                parent=styles['BodyText'],
-                fontSize=11,
-                alignment=TA_JUSTIFY,
-                spaceAfter=12
-            )
+            if self.llm_proxy.async_available:
+                # Stream the response and lay out each line as soon as it is complete
+                pending = ""
+                
+                def on_token(piece: str):
+                    nonlocal pending
+                    *lines, pending = (pending + piece).split('\n')
+                    for line in lines:
+                        self._append_line(story, line)
+                
+                content = await self._agenerate_pdf_content(topic, style, context, on_token=on_token)
+                self._append_line(story, pending)
+            else:
+                # Generate content based on style
+                content = await self._agenerate_pdf_content(topic, style, context)
+                for line in content.split('\n'):
+                    self._append_line(story, line)
             
-            # Parse and add content
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    story.append(Spacer(1, 0.2*inch))
-                elif line.startswith('#### '):
-                    # Fourth-level heading (render as subheading)
-                    story.append(Paragraph(line[5:], subheading_style))
-                elif line.startswith('### '):
-                    # Third-level heading
-                    story.append(Paragraph(line[4:], subheading_style))
-                elif line.startswith('## '):
-                    # Second-level heading
-                    story.append(Spacer(1, 0.1*inch))
-                    story.append(Paragraph(line[3:], heading_style))
-                elif line.startswith('# '):
-                    # Title (first-level heading)
-                    story.append(Paragraph(line[2:], title_style))
-                elif line.startswith('* ') or line.startswith('- '):
-                    # Bullet point
-                    bullet_text = line[2:] if line.startswith('* ') else line[2:]
-                    bullet_text = self._format_markdown_text(bullet_text)
-                    story.append(Paragraph(f"• {bullet_text}", body_style))
-                else:
-                    # Body text - format markdown
-                    formatted_line = self._format_markdown_text(line)
-                    story.append(Paragraph(formatted_line, body_style))
+            # Create PDF
+            timestamp = _timestamps().file
+            filename = f"{_safe_topic(topic.lower())}_{timestamp}.pdf"
+            filepath = self._output_dir / filename
             
             # Add footer with metadata
             story.append(Spacer(1, 0.5*inch))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor='#666666',
-                alignment=TA_CENTER
-            )
             story.append(Paragraph(
-                f"Generated by AI Agentic System | {datetime.now().strftime('%B %d, %Y')}",
-                footer_style
+                f"Generated by AI Agentic System | {_timestamps().date}",
+                self._footer_style
             ))
             
-            # Build PDF
-            doc.build(story)
+            # Layout and rendering are CPU-bound, so keep them off the event loop
+            await asyncio.to_thread(self._build_pdf, filepath, story)
             
             return {
                 "success": True,
@@ -759,36 +1317,87 @@ class PDFGeneratorTool(Tool):
                 "error": str(e)
             }
     
+    def _append_line(self, story: List, line: str):
+        """Parse one line of markdown content and add its flowables to the story."""
+        line = line.strip()
+        if not line:
+            story.append(Spacer(1, 0.2*inch))
+        elif line.startswith('#### '):
+            # Fourth-level heading (render as subheading)
+            story.append(Paragraph(line[5:], self._subheading_style))
+        elif line.startswith('### '):
+            # Third-level heading
+            story.append(Paragraph(line[4:], self._subheading_style))
+        elif line.startswith('## '):
+            # Second-level heading
+            story.append(Spacer(1, 0.1*inch))
+            story.append(Paragraph(line[3:], self._heading_style))
+        elif line.startswith('# '):
+            # Title (first-level heading)
+            story.append(Paragraph(line[2:], self._title_style))
+        elif line.startswith('* ') or line.startswith('- '):
+            # Bullet point
+            bullet_text = self._format_markdown_text(line[2:])
+            story.append(Paragraph(f"• {bullet_text}", self._body_style))
+        else:
+            # Body text - format markdown
+            formatted_line = self._format_markdown_text(line)
+            story.append(Paragraph(formatted_line, self._body_style))
+    
+    def _build_pdf(self, filepath: Path, story: List):
+        """Create and build the PDF document through a large buffered writer."""
+        with open(filepath, 'wb', buffering=_PDF_WRITE_BUFFER_SIZE) as pdf_file:
+            doc = SimpleDocTemplate(pdf_file, pagesize=letter,
+                                   topMargin=1*inch, bottomMargin=0.75*inch,
+                                   leftMargin=1*inch, rightMargin=1*inch)
+            doc.build(story)
+    
     def _format_markdown_text(self, text: str) -> str:
         """
         Convert markdown formatting to reportlab HTML tags.
         Handles: **bold**, *italic*, and code.
         """
-        import re
+        return _md_inline_to_html(text, "reportlab")
+    
+    async def _agenerate_pdf_content(self, topic: str, style: str, context: str = "",
+                                     on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Generate PDF content using LLM without blocking the event loop.
         
-        # Bold: **text** or __text__ -> <b>text</b>
-        text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
+        With on_token, the response is streamed and each piece is passed to the
+        callback as it arrives; streaming errors propagate to the caller.
+        Content found in the content cache skips the LLM call entirely.
+        """
+        namespace = f"pdf\0{self.llm_proxy.llm_provider}\0{self.llm_proxy.model_name}\0{style}"
+        if self._content_cache is not None:
+            cached = await self._content_cache.aget(topic, context, namespace)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
         
-        # Italic: *text* or _text_ -> <i>text</i>
-        text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
-        text = re.sub(r'_(.+?)_', r'<i>\1</i>', text)
+        system_prompt, user_message = self._build_pdf_prompts(topic, style, context)
         
-        # Code: `text` -> <font name="Courier">text</font>
-        text = re.sub(r'`(.+?)`', r'<font name="Courier">\1</font>', text)
+        if on_token is not None:
+            parts = []
+            async for piece in self.llm_proxy.astream(system_prompt, user_message, max_tokens=3000):
+                if piece:
+                    on_token(piece)
+                    parts.append(piece)
+            content = "".join(parts)
+        else:
+            try:
+                content = await self._acall_llm(system_prompt, user_message, max_tokens=3000)
+            except Exception as e:
+                return f"Error generating content: {e}"
         
-        return text
+        if self._content_cache is not None and content:
+            await self._content_cache.aput(topic, content, context, namespace)
+        return content
     
-    def _generate_pdf_content(self, topic: str, style: str, context: str = "") -> str:
-        """Generate PDF content using LLM."""
-        style_instructions = {
-            "report": "Create a professional report with an executive summary, detailed sections, and conclusions.",
-            "guide": "Create a practical guide with step-by-step instructions and best practices.",
-            "tutorial": "Create an educational tutorial with clear explanations and examples.",
-            "whitepaper": "Create a comprehensive whitepaper with technical depth and research-backed insights."
-        }
-        
-        instruction = style_instructions.get(style, style_instructions["report"])
+    def _build_pdf_prompts(self, topic: str, style: str, context: str = "") -> Tuple[str, str]:
+        """Build the system prompt and user message for PDF content."""
+        instruction = self._STYLE_INSTRUCTIONS.get(style, self._STYLE_INSTRUCTIONS["report"])
         
         system_prompt = f"""You are a professional technical writer creating high-quality PDF documents.
 {instruction}
@@ -806,42 +1415,4 @@ Topic: {topic}"""
         
         user_message = f"Create a comprehensive {style} about: {topic}"
         
-        try:
-            if self.llm_provider == "openai":
-                response = self.llm_client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_message}
-                    ],
-                    temperature=0.7,
-                    max_tokens=3000
-                )
-                return response.choices[0].message.content
-            
-            elif self.llm_provider == "anthropic":
-                response = self.llm_client.messages.create(
-                    model=self.model_name,
-                    max_tokens=3000,
-                    temperature=0.7,
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": user_message}
-                    ]
-                )
-                return response.content[0].text
-            
-            elif self.llm_provider == "gemini":
-                import google.generativeai as genai
-                full_prompt = f"{system_prompt}\n\n{user_message}"
-                response = self.llm_client.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.7,
-                        max_output_tokens=3000,
-                    )
-                )
-                return response.text
-        
-        except Exception as e:
-            return f"Error generating content: {e}"
+        return system_prompt, user_message
@@ -3,12 +3,17 @@ Email Sending Tool
 Tool for sending emails via Gmail API with OAuth2 authentication.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from modules.agent_tools import Tool
 import os
+import re
+import asyncio
 import base64
+import io
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.generator import BytesGenerator
 from pathlib import Path
 
 # Gmail API imports
@@ -21,10 +26,29 @@ from googleapiclient.errors import HttpError
 # Gmail API scopes
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
+# Gmail recommends keeping batch requests at 50 calls or fewer
+_MAX_BATCH_SIZE = 50
+
+# RE2 matches in linear time, so attacker-supplied addresses can't trigger
+# catastrophic backtracking (optional; the bounded pattern also limits it in re)
+try:
+    import re2 as _email_re_engine
+except ImportError:
+    _email_re_engine = re
+
+# Matched with fullmatch: in re, a '$' anchor would also accept a trailing newline
+_EMAIL_RE = _email_re_engine.compile(r'[A-Za-z0-9._%+\-]{1,64}@[A-Za-z0-9.\-]{1,253}\.[A-Za-z]{2,24}')
+
 
 class EmailSenderTool(Tool):
     """Tool for sending emails via Gmail API with OAuth2."""
     
+    # Authenticated services shared by all tool instances, and the locks that
+    # serialize sends over them, keyed by (credentials path, token path)
+    _service_cache: Dict[Tuple[str, str], Any] = {}
+    _send_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _service_cache_lock = threading.Lock()
+    
     def __init__(self, credentials_path: str = "credentials.json", token_path: str = "token.json"):
         """
         Initialize the Gmail API email tool.
@@ -55,7 +79,38 @@ class EmailSenderTool(Tool):
         }
     
     def _get_gmail_service(self):
-        """Authenticate and return Gmail API service."""
+        """
+        Authenticate and return Gmail API service.
+        
+        The service is built once per process and shared by every tool using the
+        same credential files; its credentials refresh themselves on expiry, so
+        later sends and new tool instances skip the token file entirely.
+        """
+        if self.service is not None:
+            return self.service
+        
+        key = self._service_key()
+        with EmailSenderTool._service_cache_lock:
+            service = EmailSenderTool._service_cache.get(key)
+            if service is None:
+                service = self._build_gmail_service()
+                EmailSenderTool._service_cache[key] = service
+        
+        self.service = service
+        return self.service
+    
+    def _service_key(self) -> Tuple[str, str]:
+        """Key of this tool's shared service and send lock."""
+        return (os.path.abspath(self.credentials_path), os.path.abspath(self.token_path))
+    
+    def _send_lock(self) -> threading.Lock:
+        """Lock serializing sends over the service shared by tools with the same credential files."""
+        key = self._service_key()
+        with EmailSenderTool._service_cache_lock:
+            return EmailSenderTool._send_locks.setdefault(key, threading.Lock())
+    
+    def _build_gmail_service(self):
+        """Load, refresh or create OAuth2 credentials and build the Gmail API service."""
         creds = None
         
         # Check if token already exists
@@ -87,88 +142,171 @@ class EmailSenderTool(Tool):
             with open(self.token_path, 'w') as token:
                 token.write(creds.to_json())
         
-        return build('gmail', 'v1', credentials=creds)
+        return build('gmail', 'v1', credentials=creds, cache_discovery=False)
+    
+    def _build_raw_message(self, recipient: str, subject: str, body: str, is_html: bool = False) -> str:
+        """Build a signed MIME message and encode it for the Gmail API."""
+        # Add signature to body
+        signature = "\n\n---\nSent by AI Agentic System"
+        if is_html:
+            body_with_signature = body + "<br><br><hr><p><em>Sent by AI Agentic System</em></p>"
+        else:
+            body_with_signature = body + signature
+        
+        # Create message
+        message = MIMEMultipart('alternative')
+        message['To'] = recipient
+        message['Subject'] = subject
+        
+        # Attach body
+        if is_html:
+            message.attach(MIMEText(body_with_signature, 'html'))
+        else:
+            message.attach(MIMEText(body_with_signature, 'plain'))
+        
+        # Serialize straight into a buffer and encode from a view of it,
+        # avoiding the extra copy made by message.as_bytes()
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, mangle_from_=False, policy=message.policy).flatten(message)
+        return base64.urlsafe_b64encode(buffer.getbuffer()).decode('ascii')
+    
+    @staticmethod
+    def _error(message: str) -> Dict[str, Any]:
+        """Build a failed tool result."""
+        return {
+            "success": False,
+            "result": None,
+            "error": message
+        }
     
     def execute(self, recipient: str, subject: str, body: str, is_html: bool = False, **kwargs) -> Dict[str, Any]:
         """Send email via Gmail API."""
-        try:
-            # Validate recipient email
+        return self.execute_batch([{
+            "recipient": recipient,
+            "subject": subject,
+            "body": body,
+            "is_html": is_html
+        }])[0]
+    
+    def execute_batch(self, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send several emails through batched Gmail API requests.
+        
+        Up to _MAX_BATCH_SIZE sends share a single HTTP round-trip instead of
+        paying one each.
+        
+        Args:
+            emails: Dictionaries with 'recipient', 'subject', 'body' and optional 'is_html'
+        
+        Returns:
+            One result dictionary per email, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(emails)
+        
+        # Validate recipients and encode messages
+        pending = []
+        for index, email in enumerate(emails):
+            recipient = email.get('recipient', '')
             if not self._is_valid_email(recipient):
-                return {
-                    "success": False,
-                    "result": None,
-                    "error": f"Invalid recipient email address: {recipient}"
-                }
-            
-            # Get Gmail service
+                results[index] = self._error(f"Invalid recipient email address: {recipient}")
+                continue
             try:
-                service = self._get_gmail_service()
-            except FileNotFoundError as e:
-                return {
-                    "success": False,
-                    "result": None,
-                    "error": str(e)
-                }
+                raw_message = self._build_raw_message(
+                    recipient,
+                    email.get('subject', ''),
+                    email.get('body', ''),
+                    email.get('is_html', False)
+                )
             except Exception as e:
-                return {
-                    "success": False,
-                    "result": None,
-                    "error": f"Gmail authentication failed: {str(e)}"
-                }
-            
-            # Add signature to body
-            signature = "\n\n---\nSent by AI Agentic System"
-            if is_html:
-                body_with_signature = body + "<br><br><hr><p><em>Sent by AI Agentic System</em></p>"
-            else:
-                body_with_signature = body + signature
-            
-            # Create message
-            message = MIMEMultipart('alternative')
-            message['To'] = recipient
-            message['Subject'] = subject
-            
-            # Attach body
-            if is_html:
-                message.attach(MIMEText(body_with_signature, 'html'))
-            else:
-                message.attach(MIMEText(body_with_signature, 'plain'))
-            
-            # Encode message
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-            
-            # Send via Gmail API
-            send_message = service.users().messages().send(
-                userId='me',
-                body={'raw': raw_message}
-            ).execute()
+                results[index] = self._error(str(e))
+                continue
+            pending.append((index, raw_message))
+        
+        if not pending:
+            return results
+        
+        # The cached service's HTTP connection is not thread-safe, so concurrent
+        # callers (e.g. aexecute from parallel tool runs or other tool instances
+        # sharing the service) take turns sending
+        with self._send_lock():
+            self._send_pending(emails, pending, results)
+        
+        return results
+    
+    def _send_pending(
+        self,
+        emails: List[Dict[str, Any]],
+        pending: List[Tuple[int, str]],
+        results: List[Optional[Dict[str, Any]]]
+    ):
+        """
+        Send encoded messages and fill in their results (lock must be held).
+        
+        Args:
+            emails: The emails passed to execute_batch
+            pending: (index, raw message) pairs for the emails that passed validation
+            results: Per-email results, filled in place
+        """
+        # Get Gmail service
+        try:
+            service = self._get_gmail_service()
+        except FileNotFoundError as e:
+            for index, _ in pending:
+                results[index] = self._error(str(e))
+            return
+        except Exception as e:
+            for index, _ in pending:
+                results[index] = self._error(f"Gmail authentication failed: {str(e)}")
+            return
+        
+        def on_sent(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                if isinstance(exception, HttpError):
+                    results[index] = self._error(f"Gmail API error: {str(exception)}")
+                else:
+                    results[index] = self._error(str(exception))
+                return
             
-            return {
+            email = emails[index]
+            results[index] = {
                 "success": True,
                 "result": {
-                    "message": f"Email sent successfully to {recipient}",
-                    "recipient": recipient,
-                    "subject": subject,
-                    "message_id": send_message.get('id')
+                    "message": f"Email sent successfully to {email['recipient']}",
+                    "recipient": email['recipient'],
+                    "subject": email.get('subject', ''),
+                    "message_id": response.get('id')
                 },
                 "error": None
             }
+        
+        # Send via Gmail API, one batch request per _MAX_BATCH_SIZE emails
+        for start in range(0, len(pending), _MAX_BATCH_SIZE):
+            chunk = pending[start:start + _MAX_BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=on_sent)
+            for index, raw_message in chunk:
+                batch.add(
+                    service.users().messages().send(userId='me', body={'raw': raw_message}),
+                    request_id=str(index)
+                )
             
-        except HttpError as e:
-            return {
-                "success": False,
-                "result": None,
-                "error": f"Gmail API error: {str(e)}"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "result": None,
-                "error": str(e)
-            }
+            try:
+                batch.execute()
+            except HttpError as e:
+                error = f"Gmail API error: {str(e)}"
+            except Exception as e:
+                error = str(e)
+            else:
+                continue
+            
+            for index, _ in chunk:
+                if results[index] is None:
+                    results[index] = self._error(error)
+    
+    async def aexecute_batch(self, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async variant of execute_batch that sends from a worker thread."""
+        return await asyncio.to_thread(self.execute_batch, emails)
     
-    def _is_valid_email(self, email: str) -> bool:
-        """Basic email validation."""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+    def _is_valid_email(self, email: Any) -> bool:
+        """Basic email validation; non-strings (e.g. a missing LLM-extracted recipient) are invalid."""
+        return isinstance(email, str) and _EMAIL_RE.fullmatch(email) is not None
@@ -0,0 +1,9 @@
+"""
+Embedding model weight precisions.
+
+Kept free of heavy imports so command-line parsing can offer the choices
+without loading torch or sentence-transformers.
+"""
+
+# Weight precisions for the embedding model; 'auto' is fp16 on CUDA and fp32 elsewhere
+EMBEDDING_PRECISIONS = ("auto", "fp32", "bf16", "int8")
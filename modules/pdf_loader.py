@@ -3,9 +3,66 @@ PDF Loader Module
 Extracts text content from PDF files reliably.
 """
 
-import PyPDF2
+import multiprocessing
+import os
+import pypdfium2 as pdfium
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
+
+# Below this many pages, starting worker processes costs more than it saves
+_MIN_PAGES_FOR_POOL = 4
+
+
+def process_pool_context():
+    """
+    Multiprocessing context for PDF extraction worker pools.
+    
+    Extraction pools are started from multi-threaded processes (the agent, the
+    knowledge-base embedding thread), and a forked child can inherit locks held
+    by other threads and deadlock. Workers are therefore started by a
+    single-threaded fork server with the extraction modules preloaded, or spawned
+    fresh where fork servers are not available.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['modules.pdf_loader', 'modules.text_chunker'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _page_text(pdf: pdfium.PdfDocument, page_index: int) -> str:
+    """Extract the text of one page, releasing PDFium's page buffers afterwards."""
+    page = pdf[page_index]
+    try:
+        textpage = page.get_textpage()
+        try:
+            # PDFium ends lines with CRLF; keep plain newlines for the chunker
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+    finally:
+        page.close()
+
+
+def _extract_page_range(args: Tuple[Union[str, bytes], int, int]) -> List[Tuple[int, str]]:
+    """
+    Extract the text of a range of pages in a worker process.
+    
+    PDFium is not thread-safe, so each worker opens its own copy of the document.
+    
+    Args:
+        args: (pdf path or bytes, start, stop) page indices, stop exclusive
+    
+    Returns:
+        List of (page_index, text) tuples
+    """
+    source, start, stop = args
+    pdf = pdfium.PdfDocument(source)
+    try:
+        return [(page_index, _page_text(pdf, page_index)) for page_index in range(start, stop)]
+    finally:
+        pdf.close()
 
 
 class PDFLoader:
@@ -19,9 +76,31 @@ class PDFLoader:
             pdf_path: Path to the PDF file
         """
         self.pdf_path = Path(pdf_path)
+        self._data = None
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     
+    @classmethod
+    def from_bytes(cls, data: bytes, name: str = "document.pdf") -> "PDFLoader":
+        """
+        Create a loader that parses a PDF already read into memory.
+        
+        Args:
+            data: Raw PDF file contents
+            name: File name used in messages and as the page 'source'
+        
+        Returns:
+            PDFLoader instance
+        """
+        loader = cls.__new__(cls)
+        loader.pdf_path = Path(name)
+        loader._data = data
+        return loader
+    
+    def _open(self) -> pdfium.PdfDocument:
+        """Open the document from memory if available, otherwise from disk."""
+        return pdfium.PdfDocument(self._data if self._data is not None else self.pdf_path)
+    
     def extract_text(self) -> str:
         """
         Extract all text from the PDF.
@@ -29,22 +108,23 @@ class PDFLoader:
         Returns:
             Extracted text as a single string
         """
-        text = ""
+        parts = []
         
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
+            pdf = self._open()
+            try:
+                num_pages = len(pdf)
                 
                 print(f"Processing PDF: {self.pdf_path.name}")
                 print(f"Total pages: {num_pages}")
                 
                 for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    text += page_text + "\n\n"
+                    parts.append(_page_text(pdf, page_num))
                 
+                text = "\n\n".join(parts)
                 print(f"Successfully extracted {len(text)} characters")
+            finally:
+                pdf.close()
                 
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
@@ -62,25 +142,58 @@ class PDFLoader:
         pages_data = []
         
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
+            pdf = self._open()
+            try:
+                num_pages = len(pdf)
                 
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    
-                    pages_data.append({
-                        'page_number': page_num + 1,
-                        'text': page_text.strip(),
-                        'source': str(self.pdf_path)
-                    })
+                # Small documents are read here; larger ones go to the process pool
+                page_texts = None
+                if num_pages < _MIN_PAGES_FOR_POOL:
+                    page_texts = [_page_text(pdf, page_num) for page_num in range(num_pages)]
+            finally:
+                pdf.close()
+            
+            if page_texts is None:
+                page_texts = self._extract_pages_parallel(num_pages)
+            
+            for page_num, page_text in enumerate(page_texts):
+                pages_data.append({
+                    'page_number': page_num + 1,
+                    'text': page_text.strip(),
+                    'source': str(self.pdf_path)
+                })
                 
         except Exception as e:
             print(f"Error extracting text by pages: {e}")
             raise
         
         return pages_data
+    
+    def _extract_pages_parallel(self, num_pages: int) -> List[str]:
+        """
+        Extract page texts across a process pool, one contiguous page range per task.
+        
+        Args:
+            num_pages: Total number of pages in the PDF
+        
+        Returns:
+            Page texts in page order
+        """
+        workers = min(os.cpu_count() or 1, num_pages)
+        range_size = -(-num_pages // workers)
+        source = self._data if self._data is not None else str(self.pdf_path)
+        tasks = [
+            (source, start, min(start + range_size, num_pages))
+            for start in range(0, num_pages, range_size)
+        ]
+        
+        page_texts = [""] * num_pages
+        with ProcessPoolExecutor(max_workers=len(tasks), mp_context=process_pool_context()) as executor:
+            for results in executor.map(_extract_page_range, tasks):
+                for page_index, text in results:
+                    page_texts[page_index] = text
+        
+        return page_texts
 
 
 if __name__ == "__main__":
@@ -4,15 +4,21 @@ Retrieves relevant context and generates answers using LLM.
 """
 
 import os
-from typing import List, Dict, Optional
-from openai import OpenAI
-from anthropic import Anthropic
+import asyncio
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from openai import OpenAI, AsyncOpenAI
+from anthropic import Anthropic, AsyncAnthropic
 import google.generativeai as genai
 from dotenv import load_dotenv
+from modules.semantic_cache import SemanticCache
 
 # Load environment variables
 load_dotenv()
 
+# Prefix of the answer returned when the LLM call fails
+ANSWER_ERROR_PREFIX = "Error generating answer: "
+
 
 class RAGSystem:
     """Handles retrieval and generation for question answering."""
@@ -23,7 +29,8 @@ class RAGSystem:
         llm_provider: str = "openai",
         model_name: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        coverage_quantile: float = 0.05
     ):
         """
         Initialize RAG system.
@@ -34,29 +41,84 @@ class RAGSystem:
             model_name: Model name (default: gpt-3.5-turbo for OpenAI, claude-3-sonnet for Anthropic, gemini-2.5-flash for Gemini)
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            coverage_quantile: A topic counts as covered by the knowledge base when
+                it is at least as similar to the corpus centroid as this quantile of
+                the corpus's own chunks
         """
         self.vector_db = vector_db
         self.llm_provider = llm_provider.lower()
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.coverage_quantile = coverage_quantile
         
         # Initialize LLM client
         if self.llm_provider == "openai":
             self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
             self.model_name = model_name or "gpt-3.5-turbo"
         elif self.llm_provider == "anthropic":
             self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.async_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
             self.model_name = model_name or "claude-3-sonnet-20240229"
         elif self.llm_provider == "gemini":
             genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
             # Use the latest stable Gemini model (gemini-2.5-flash is faster, gemini-2.5-pro is more capable)
             self.model_name = model_name or "gemini-2.5-flash"
             self.client = genai.GenerativeModel(self.model_name)
+            self.async_client = self.client
         else:
             raise ValueError(f"Unsupported LLM provider: {llm_provider}. Choose 'openai', 'anthropic', or 'gemini'")
         
+        # Cache of answers for exact and near-duplicate queries
+        self.answer_cache = SemanticCache(embed_fn=self._embed_query)
+        
         print(f"Initialized RAG system with {self.llm_provider} ({self.model_name})")
     
+    def _embed_query(self, query: str):
+        """Embed a query through the vector database's query-embedding cache."""
+        return self.vector_db.embed_query(query)
+    
+    def _answer_cache_namespace(self, query_template: str, n_results: int, max_tokens: Optional[int]) -> str:
+        """Namespace for cached topic answers; changes whenever the vector database does."""
+        return f"{query_template}\0n_results={n_results}\0max_tokens={max_tokens}\0generation={self.vector_db.generation}"
+    
+    @staticmethod
+    def _is_cacheable_answer(result: Dict) -> bool:
+        """Failed generations are returned to the caller but never cached."""
+        return not result.get('answer', '').startswith(ANSWER_ERROR_PREFIX)
+    
+    def topic_is_covered(self, topic: str) -> bool:
+        """
+        Cheaply check whether the knowledge base is likely to help with a topic.
+        
+        Compares the topic embedding with the corpus centroid, so callers can
+        skip a full retrieve-and-generate round-trip for unrelated topics. The
+        threshold is calibrated on the corpus itself: the chunk-to-centroid
+        similarity at `coverage_quantile`.
+        
+        Args:
+            topic: Topic or query text
+        
+        Returns:
+            True if the topic is close enough to the corpus
+        """
+        try:
+            reference = self.vector_db.get_coverage_reference(self.coverage_quantile)
+        except Exception:
+            # If the check itself fails, fall back to retrieving as before
+            return True
+        
+        if reference is None:
+            return False
+        centroid, threshold = reference
+        
+        embedding = np.asarray(self._embed_query(topic), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if not norm:
+            return False
+        
+        return float(embedding @ centroid) / float(norm) >= threshold
+    
     def retrieve_context(
         self,
         query: str,
@@ -102,23 +164,13 @@ class RAGSystem:
         
         return "\n".join(context_parts)
     
-    def generate_answer(
+    def _build_prompts(
         self,
         query: str,
         context: str,
         system_prompt: Optional[str] = None
-    ) -> str:
-        """
-        Generate an answer using the LLM.
-        
-        Args:
-            query: User's question
-            context: Retrieved context
-            system_prompt: Custom system prompt (optional)
-        
-        Returns:
-            Generated answer
-        """
+    ) -> Tuple[str, str]:
+        """Build the system prompt and user message for answer generation."""
         if system_prompt is None:
             system_prompt = (
                 "You are a helpful assistant that answers questions based on the provided context. "
@@ -134,6 +186,30 @@ Question: {query}
 
 Please answer the question based on the context provided above."""
         
+        return system_prompt, user_message
+    
+    def generate_answer(
+        self,
+        query: str,
+        context: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Generate an answer using the LLM.
+        
+        Args:
+            query: User's question
+            context: Retrieved context
+            system_prompt: Custom system prompt (optional)
+            max_tokens: Override for the maximum response tokens (optional)
+        
+        Returns:
+            Generated answer
+        """
+        system_prompt, user_message = self._build_prompts(query, context, system_prompt)
+        max_tokens = max_tokens or self.max_tokens
+        
         try:
             if self.llm_provider == "openai":
                 response = self.client.chat.completions.create(
@@ -143,14 +219,14 @@ Please answer the question based on the context provided above."""
                         {"role": "user", "content": user_message}
                     ],
                     temperature=self.temperature,
-                    max_tokens=self.max_tokens
+                    max_tokens=max_tokens
                 )
                 return response.choices[0].message.content
             
             elif self.llm_provider == "anthropic":
                 response = self.client.messages.create(
                     model=self.model_name,
-                    max_tokens=self.max_tokens,
+                    max_tokens=max_tokens,
                     temperature=self.temperature,
                     system=system_prompt,
                     messages=[
@@ -167,19 +243,20 @@ Please answer the question based on the context provided above."""
                     full_prompt,
                     generation_config=genai.types.GenerationConfig(
                         temperature=self.temperature,
-                        max_output_tokens=self.max_tokens,
+                        max_output_tokens=max_tokens,
                     )
                 )
                 return response.text
         
         except Exception as e:
-            return f"Error generating answer: {e}"
+            return f"{ANSWER_ERROR_PREFIX}{e}"
     
     def answer_question(
         self,
         query: str,
         n_results: int = 5,
-        return_context: bool = False
+        return_context: bool = False,
+        max_tokens: Optional[int] = None
     ) -> Dict:
         """
         Complete RAG pipeline: retrieve and generate answer.
@@ -188,6 +265,7 @@ Please answer the question based on the context provided above."""
             query: User's question
             n_results: Number of chunks to retrieve
             return_context: Whether to return retrieved context
+            max_tokens: Override for the maximum answer tokens (optional)
         
         Returns:
             Dictionary with answer and optionally context
@@ -203,7 +281,7 @@ Please answer the question based on the context provided above."""
         
         # Generate answer
         print("Generating answer...")
-        answer = self.generate_answer(query, context)
+        answer = self.generate_answer(query, context, max_tokens=max_tokens)
         
         result = {
             'query': query,
@@ -215,6 +293,147 @@ Please answer the question based on the context provided above."""
         
         return result
     
+    async def agenerate_answer(
+        self,
+        query: str,
+        context: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Generate an answer using the LLM without blocking the event loop.
+        
+        Args:
+            query: User's question
+            context: Retrieved context
+            system_prompt: Custom system prompt (optional)
+            max_tokens: Override for the maximum response tokens (optional)
+        
+        Returns:
+            Generated answer
+        """
+        system_prompt, user_message = self._build_prompts(query, context, system_prompt)
+        max_tokens = max_tokens or self.max_tokens
+        
+        try:
+            if self.llm_provider == "openai":
+                response = await self.async_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=max_tokens
+                )
+                return response.choices[0].message.content
+            
+            elif self.llm_provider == "anthropic":
+                response = await self.async_client.messages.create(
+                    model=self.model_name,
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    system=system_prompt,
+                    messages=[
+                        {"role": "user", "content": user_message}
+                    ]
+                )
+                return response.content[0].text
+            
+            elif self.llm_provider == "gemini":
+                full_prompt = f"{system_prompt}\n\n{user_message}"
+                
+                response = await self.async_client.generate_content_async(
+                    full_prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=self.temperature,
+                        max_output_tokens=max_tokens,
+                    )
+                )
+                return response.text
+        
+        except Exception as e:
+            return f"{ANSWER_ERROR_PREFIX}{e}"
+    
+    async def aanswer_question(
+        self,
+        query: str,
+        n_results: int = 5,
+        return_context: bool = False,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """
+        Async variant of answer_question.
+        
+        Retrieval (embedding + vector search) runs in a worker thread and the
+        LLM call is awaited, so other coroutines keep running meanwhile.
+        """
+        print(f"\nProcessing query: {query}")
+        
+        print(f"Retrieving top {n_results} relevant chunks...")
+        chunks = await asyncio.to_thread(self.retrieve_context, query, n_results)
+        
+        context = self.format_context(chunks)
+        
+        print("Generating answer...")
+        answer = await self.agenerate_answer(query, context, max_tokens=max_tokens)
+        
+        result = {
+            'query': query,
+            'answer': answer
+        }
+        
+        if return_context:
+            result['context'] = chunks
+        
+        return result
+    
+    def answer_topic(
+        self,
+        topic: str,
+        query_template: str,
+        n_results: int = 5,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """
+        Answer a templated query about a topic through the answer cache.
+        
+        Entries are keyed by the topic alone, so the template's boilerplate does
+        not dilute the similarity between rephrased topics.
+        
+        Args:
+            topic: Topic to answer about
+            query_template: Query text with a '{topic}' placeholder
+            n_results: Number of chunks to retrieve
+            max_tokens: Override for the maximum answer tokens (optional)
+        
+        Returns:
+            Dictionary with answer and context
+        """
+        query = query_template.replace("{topic}", topic)
+        return self.answer_cache.get_or_compute(
+            topic,
+            lambda: self.answer_question(query, n_results=n_results, return_context=True, max_tokens=max_tokens),
+            namespace=self._answer_cache_namespace(query_template, n_results, max_tokens),
+            should_cache=self._is_cacheable_answer
+        )
+    
+    async def aanswer_topic(
+        self,
+        topic: str,
+        query_template: str,
+        n_results: int = 5,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """Async variant of answer_topic."""
+        query = query_template.replace("{topic}", topic)
+        return await self.answer_cache.aget_or_compute(
+            topic,
+            lambda: self.aanswer_question(query, n_results=n_results, return_context=True, max_tokens=max_tokens),
+            namespace=self._answer_cache_namespace(query_template, n_results, max_tokens),
+            should_cache=self._is_cacheable_answer
+        )
+    
     def interactive_qa(self):
         """
         Interactive question-answering loop with session tracking.
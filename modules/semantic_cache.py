@@ -0,0 +1,443 @@
+"""
+Semantic Cache Module
+Caches results for exact and near-duplicate queries (e.g. RAG answers and
+generated content).
+"""
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Two-tier query cache.
+    
+    Exact hits are looked up by a hash of the canonicalized query. Near hits are
+    found with random-projection LSH over query embeddings and accepted when the
+    cosine similarity to a cached query reaches the threshold.
+    """
+    
+    def __init__(
+        self,
+        embed_fn: Callable[[str], np.ndarray],
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 512,
+        n_tables: int = 4,
+        n_planes: int = 6,
+        seed: int = 0
+    ):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            embed_fn: Function mapping a query string to its embedding vector
+            similarity_threshold: Minimum cosine similarity for a near hit
+            ttl_seconds: Time-to-live of cached entries
+            max_entries: Maximum number of cached entries (oldest evicted first)
+            n_tables: Number of LSH hash tables
+            n_planes: Number of random hyperplanes per table
+            seed: Seed for the random hyperplanes
+        """
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.n_tables = n_tables
+        self.n_planes = n_planes
+        self._rng = np.random.default_rng(seed)
+        
+        # Hyperplanes are created on first use, once the embedding size is known
+        self._planes: Optional[np.ndarray] = None
+        self._bit_weights = 1 << np.arange(n_planes)
+        
+        # key -> (namespace, normalized vector, value, expiry timestamp)
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, Any, float]]" = OrderedDict()
+        self._buckets: List[Dict[Tuple[str, int], Set[str]]] = [{} for _ in range(n_tables)]
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _canonicalize(query: str) -> str:
+        """Normalize case and whitespace so trivially different queries share a key."""
+        return re.sub(r'\s+', ' ', query).strip().lower()
+    
+    @staticmethod
+    def _exact_key(canonical: str, namespace: str) -> str:
+        """Hash a canonical query into an exact-match key."""
+        return hashlib.blake2b(f"{namespace}\0{canonical}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _embed(self, canonical: str) -> np.ndarray:
+        """Embed a query and L2-normalize it."""
+        vector = np.asarray(self.embed_fn(canonical), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _signatures(self, vector: np.ndarray) -> List[int]:
+        """Compute one LSH signature per table."""
+        if self._planes is None:
+            self._planes = self._rng.standard_normal((self.n_tables, self.n_planes, vector.shape[0])).astype(np.float32)
+        bits = (self._planes @ vector) > 0
+        return [int(b) for b in bits @ self._bit_weights]
+    
+    def _remove(self, key: str):
+        """Remove an entry and its bucket memberships (lock must be held)."""
+        namespace, vector, _, _ = self._entries.pop(key)
+        for table, signature in zip(self._buckets, self._signatures(vector)):
+            bucket = table.get((namespace, signature))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[(namespace, signature)]
+    
+    def _get_exact(self, key: str) -> Tuple[bool, Any]:
+        """Look up an exact key, dropping it if expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[3] < time.monotonic():
+                self._remove(key)
+                return False, None
+            return True, entry[2]
+    
+    def _get_near(self, vector: np.ndarray, namespace: str) -> Tuple[bool, Any]:
+        """Look up the most similar cached query among LSH candidates."""
+        now = time.monotonic()
+        with self._lock:
+            candidates: Set[str] = set()
+            for table, signature in zip(self._buckets, self._signatures(vector)):
+                candidates.update(table.get((namespace, signature), ()))
+            
+            best_key, best_score = None, self.similarity_threshold
+            for key in candidates:
+                _, cached_vector, _, expires_at = self._entries[key]
+                if expires_at < now:
+                    continue
+                score = float(cached_vector @ vector)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            
+            if best_key is None:
+                return False, None
+            return True, self._entries[best_key][2]
+    
+    def _put(self, key: str, vector: np.ndarray, value: Any, namespace: str):
+        """Store a value under its exact key and LSH buckets."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            
+            self._entries[key] = (namespace, vector, value, time.monotonic() + self.ttl_seconds)
+            for table, signature in zip(self._buckets, self._signatures(vector)):
+                table.setdefault((namespace, signature), set()).add(key)
+    
+    def get_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Any],
+        namespace: str = "",
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Return the cached value for a query, computing and storing it on a miss.
+        
+        Args:
+            query: Query text
+            compute: Zero-argument function producing the value on a miss
+            namespace: Separates entries whose values depend on extra parameters
+            should_cache: Predicate deciding whether a computed value is stored
+                (e.g. to skip failures); every value is stored by default
+        
+        Returns:
+            Cached or freshly computed value
+        """
+        canonical = self._canonicalize(query)
+        key = self._exact_key(canonical, namespace)
+        
+        found, value = self._get_exact(key)
+        if found:
+            self.hits += 1
+            return value
+        
+        vector = self._embed(canonical)
+        found, value = self._get_near(vector, namespace)
+        if found:
+            self.near_hits += 1
+            return value
+        
+        self.misses += 1
+        value = compute()
+        if should_cache is None or should_cache(value):
+            self._put(key, vector, value, namespace)
+        return value
+    
+    async def aget_or_compute(
+        self,
+        query: str,
+        compute: Callable[[], Awaitable[Any]],
+        namespace: str = "",
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Async variant of get_or_compute.
+        
+        Args:
+            query: Query text
+            compute: Zero-argument function returning an awaitable for the value
+            namespace: Separates entries whose values depend on extra parameters
+            should_cache: Predicate deciding whether a computed value is stored
+        
+        Returns:
+            Cached or freshly computed value
+        """
+        canonical = self._canonicalize(query)
+        key = self._exact_key(canonical, namespace)
+        
+        found, value = self._get_exact(key)
+        if found:
+            self.hits += 1
+            return value
+        
+        vector = await asyncio.to_thread(self._embed, canonical)
+        found, value = self._get_near(vector, namespace)
+        if found:
+            self.near_hits += 1
+            return value
+        
+        self.misses += 1
+        value = await compute()
+        if should_cache is None or should_cache(value):
+            self._put(key, vector, value, namespace)
+        return value
+    
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            for table in self._buckets:
+                table.clear()
+    
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with cache statistics
+        """
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses
+        }
+
+
+# Default location of the content cache, next to the outputs directory
+_CONTENT_CACHE_PATH = Path(__file__).resolve().parent.parent / "content_cache.db"
+
+# Columns of the current content cache schema; older files are rebuilt
+_CONTENT_CACHE_COLUMNS = {"prompt_key", "namespace", "context_hash", "topic_vec", "content", "created_at"}
+
+
+class ContentCache:
+    """
+    Persistent two-tier cache for generated content, stored in SQLite.
+    
+    Exact hits are looked up by a hash of the namespace, topic and reference
+    context. Near hits compare the topic embedding with the cached topics of the
+    same namespace and reference context and are accepted when the cosine
+    similarity reaches the threshold, so rephrased topics reuse earlier content
+    across runs. Entries expire after a TTL and the oldest are evicted beyond
+    the size bound.
+    """
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        similarity_threshold: float = 0.95,
+        context_chars: int = 3000,
+        ttl_seconds: float = 7 * 24 * 3600.0,
+        max_entries: int = 1000
+    ):
+        """
+        Initialize the content cache.
+        
+        Args:
+            db_path: Path of the SQLite database file (default: content_cache.db
+                in the project directory)
+            embed_fn: Function mapping a topic to its embedding vector
+                (near hits are disabled without it)
+            similarity_threshold: Minimum cosine similarity for a near hit
+            context_chars: Number of context characters that take part in the keys
+            ttl_seconds: Time-to-live of cached entries
+            max_entries: Maximum number of cached entries (oldest evicted first)
+        """
+        self.db_path = str(db_path or _CONTENT_CACHE_PATH)
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.context_chars = context_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(content_cache)")}
+            if columns and columns != _CONTENT_CACHE_COLUMNS:
+                # Cache files from an older schema are simply rebuilt
+                self._conn.execute("DROP TABLE content_cache")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS content_cache ("
+                "prompt_key TEXT PRIMARY KEY, namespace TEXT NOT NULL, context_hash TEXT NOT NULL, "
+                "topic_vec BLOB, content TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS content_cache_context "
+                "ON content_cache (namespace, context_hash)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS content_cache_created ON content_cache (created_at)"
+            )
+        
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+    
+    def _context_hash(self, context: str) -> str:
+        """Hash the leading context characters."""
+        return hashlib.sha256(context[:self.context_chars].encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _key(topic: str, context_hash: str, namespace: str) -> str:
+        """Hash the canonical topic and the context hash into an exact-match key."""
+        canonical = SemanticCache._canonicalize(topic)
+        text = f"{namespace}\0{canonical}\0{context_hash}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _embed(self, topic: str) -> Optional[np.ndarray]:
+        """Embed a topic and L2-normalize it, if an embedding function is set."""
+        if self.embed_fn is None:
+            return None
+        vector = np.asarray(self.embed_fn(SemanticCache._canonicalize(topic)), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def get(self, topic: str, context: str = "", namespace: str = "") -> Optional[str]:
+        """
+        Look up cached content for a topic.
+        
+        Args:
+            topic: Topic the content was generated for
+            context: Reference context used for generation
+            namespace: Separates entries by provider, model, style, etc.
+        
+        Returns:
+            Cached content, or None on a miss
+        """
+        context_hash = self._context_hash(context)
+        key = self._key(topic, context_hash, namespace)
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM content_cache WHERE prompt_key = ? AND created_at >= ?", (key, cutoff)
+            ).fetchone()
+        if row is not None:
+            self.hits += 1
+            return row[0]
+        
+        vector = self._embed(topic)
+        if vector is not None:
+            # Only entries generated from the same reference context are candidates,
+            # which also keeps the scan down to a handful of rows
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT topic_vec, content FROM content_cache "
+                    "WHERE namespace = ? AND context_hash = ? AND created_at >= ? AND topic_vec IS NOT NULL",
+                    (namespace, context_hash, cutoff)
+                ).fetchall()
+            if rows:
+                cached_vectors = np.stack([np.frombuffer(blob, dtype=np.float32) for blob, _ in rows])
+                scores = cached_vectors @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    self.near_hits += 1
+                    return rows[best][1]
+        
+        self.misses += 1
+        return None
+    
+    def put(self, topic: str, content: str, context: str = "", namespace: str = ""):
+        """
+        Store generated content for a topic, evicting expired and excess entries.
+        
+        Args:
+            topic: Topic the content was generated for
+            content: Generated content
+            context: Reference context used for generation
+            namespace: Separates entries by provider, model, style, etc.
+        """
+        context_hash = self._context_hash(context)
+        key = self._key(topic, context_hash, namespace)
+        vector = self._embed(topic)
+        blob = vector.tobytes() if vector is not None else None
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_cache "
+                "(prompt_key, namespace, context_hash, topic_vec, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, context_hash, blob, content, now)
+            )
+            self._conn.execute(
+                "DELETE FROM content_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._conn.execute(
+                "DELETE FROM content_cache WHERE prompt_key IN ("
+                "SELECT prompt_key FROM content_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+    
+    async def aget(self, topic: str, context: str = "", namespace: str = "") -> Optional[str]:
+        """Async variant of get; embedding and SQLite I/O run in a worker thread."""
+        return await asyncio.to_thread(self.get, topic, context, namespace)
+    
+    async def aput(self, topic: str, content: str, context: str = "", namespace: str = ""):
+        """Async variant of put; embedding and SQLite I/O run in a worker thread."""
+        await asyncio.to_thread(self.put, topic, content, context, namespace)
+    
+    def clear(self):
+        """Drop all cached content."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content_cache")
+    
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM content_cache").fetchone()[0]
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses
+        }
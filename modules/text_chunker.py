@@ -3,10 +3,48 @@ Text Chunking Module
 Splits text into smaller, semantically meaningful chunks for embedding.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter, CharacterTextSplitter
 
+# Rust-backed splitter (optional; the LangChain splitter is used without it)
+try:
+    from semantic_text_splitter import TextSplitter
+    _TEXT_SPLITTER_AVAILABLE = True
+except ImportError:
+    _TEXT_SPLITTER_AVAILABLE = False
+
+# JIT-compiled stats reduction (optional; numpy is used without it)
+try:
+    import numba
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+# Below this many chunks, numba's dispatch overhead outweighs the fused loop
+_NUMBA_MIN_CHUNKS = 10_000
+
+if _NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _stats_kernel(sizes):
+        """Compute (min, max, sum) of chunk sizes in a single pass."""
+        lo = sizes[0]
+        hi = sizes[0]
+        total = 0
+        for size in sizes:
+            if size < lo:
+                lo = size
+            if size > hi:
+                hi = size
+            total += size
+        return lo, hi, total
+
+# Runs of spaces and blank-line gaps, normalized together in one regex pass
+_WHITESPACE_RE = re.compile(r'(?P<spaces> +)|(?P<blank>\n\s*\n)')
+_WHITESPACE_REPLACEMENTS = {'spaces': ' ', 'blank': '\n\n'}
+
 
 class TextChunker:
     """Splits text into semantically meaningful chunks."""
@@ -24,20 +62,30 @@ class TextChunker:
             chunk_size: Maximum size of each chunk in characters
             chunk_overlap: Number of overlapping characters between chunks
             separators: List of separators to split on (default: paragraphs, sentences, etc.)
+        
+        With the default separators, splitting runs natively in semantic-text-splitter
+        when it is installed, which also breaks at paragraphs, then sentences, then words.
+        Custom separators always use LangChain's recursive splitter.
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         
-        # Default separators: try to split on paragraphs, then sentences, then words
-        if separators is None:
-            separators = ["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
+        self.splitter = None
+        self._native_splitter = None
         
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=separators,
-            length_function=len
-        )
+        if separators is None and _TEXT_SPLITTER_AVAILABLE:
+            self._native_splitter = TextSplitter(chunk_size, overlap=chunk_overlap)
+        else:
+            # Default separators: try to split on paragraphs, then sentences, then words
+            if separators is None:
+                separators = ["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
+            
+            self.splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=separators,
+                length_function=len
+            )
     
     def chunk_text(self, text: str, metadata: Optional[Dict] = None) -> List[Dict]:
         """
@@ -57,7 +105,10 @@ class TextChunker:
         text = self._clean_text(text)
         
         # Split into chunks
-        chunks = self.splitter.split_text(text)
+        if self._native_splitter is not None:
+            chunks = self._native_splitter.chunks(text)
+        else:
+            chunks = self.splitter.split_text(text)
         
         # Add metadata to each chunk
         chunk_data = []
@@ -83,34 +134,46 @@ class TextChunker:
         """
         Chunk multiple documents with their metadata.
         
+        Documents are chunked concurrently in a thread pool; the chunks are
+        returned in document order.
+        
         Args:
             documents: List of dictionaries with 'text' and optional metadata
         
         Returns:
             List of all chunks from all documents
         """
-        all_chunks = []
+        if len(documents) <= 1:
+            chunks_per_doc = map(self._chunk_one, enumerate(documents))
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(documents))) as executor:
+                chunks_per_doc = list(executor.map(self._chunk_one, enumerate(documents)))
         
-        for doc_idx, doc in enumerate(documents):
-            text = doc.get('text', '')
-            
-            # Prepare metadata
-            metadata = {
-                'doc_id': doc_idx,
-                'source': doc.get('source', 'unknown')
-            }
-            
-            # Add any additional metadata from the document
-            for key, value in doc.items():
-                if key not in ['text']:
-                    metadata[key] = value
-            
-            # Chunk this document
-            doc_chunks = self.chunk_text(text, metadata)
+        all_chunks = []
+        for doc_chunks in chunks_per_doc:
             all_chunks.extend(doc_chunks)
         
         return all_chunks
     
+    def _chunk_one(self, idx_doc: Tuple[int, Dict[str, str]]) -> List[Dict]:
+        """Chunk a single (index, document) pair for chunk_documents."""
+        doc_idx, doc = idx_doc
+        text = doc.get('text', '')
+        
+        # Prepare metadata
+        metadata = {
+            'doc_id': doc_idx,
+            'source': doc.get('source', 'unknown')
+        }
+        
+        # Add any additional metadata from the document
+        for key, value in doc.items():
+            if key not in ['text']:
+                metadata[key] = value
+        
+        # Chunk this document
+        return self.chunk_text(text, metadata)
+    
     @staticmethod
     def _clean_text(text: str) -> str:
         """
@@ -122,16 +185,12 @@ class TextChunker:
         Returns:
             Cleaned text
         """
-        # Replace multiple spaces with single space
-        text = re.sub(r' +', ' ', text)
-        
-        # Replace multiple newlines with double newline
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        # Replace multiple spaces with single space and multiple newlines
+        # with double newline, in a single pass
+        text = _WHITESPACE_RE.sub(lambda m: _WHITESPACE_REPLACEMENTS[m.lastgroup], text)
         
         # Remove leading/trailing whitespace
-        text = text.strip()
-        
-        return text
+        return text.strip()
     
     def get_chunk_stats(self, chunks: List[Dict]) -> Dict:
         """
@@ -151,14 +210,23 @@ class TextChunker:
                 'max_chunk_size': 0
             }
         
-        chunk_sizes = [chunk['chunk_size'] for chunk in chunks]
+        chunk_sizes = np.fromiter(
+            (chunk['chunk_size'] for chunk in chunks),
+            dtype=np.int64,
+            count=len(chunks)
+        )
+        if _NUMBA_AVAILABLE and len(chunks) >= _NUMBA_MIN_CHUNKS:
+            min_size, max_size, total = _stats_kernel(chunk_sizes)
+        else:
+            min_size, max_size, total = chunk_sizes.min(), chunk_sizes.max(), chunk_sizes.sum()
+        total = int(total)
         
         return {
             'total_chunks': len(chunks),
-            'avg_chunk_size': sum(chunk_sizes) / len(chunk_sizes),
-            'min_chunk_size': min(chunk_sizes),
-            'max_chunk_size': max(chunk_sizes),
-            'total_characters': sum(chunk_sizes)
+            'avg_chunk_size': total / len(chunks),
+            'min_chunk_size': int(min_size),
+            'max_chunk_size': int(max_size),
+            'total_characters': total
         }
 
 
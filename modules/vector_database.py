@@ -6,13 +6,22 @@ Handles embedding generation and storage in ChromaDB.
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+import torch
+from typing import List, Dict, Optional, Set, Tuple
+import numpy as np
+import functools
+import hashlib
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import os
 import sys
 from pathlib import Path
 from tqdm import tqdm
 import warnings
 import contextlib
+from modules.semantic_cache import SemanticCache
+from modules.embedding_precision import EMBEDDING_PRECISIONS
 
 # Disable ChromaDB telemetry to avoid error messages
 os.environ['ANONYMIZED_TELEMETRY'] = 'False'
@@ -23,6 +32,50 @@ import logging
 logging.getLogger('chromadb.telemetry.posthog').setLevel(logging.CRITICAL)
 logging.getLogger('chromadb.telemetry').setLevel(logging.CRITICAL)
 
+# Embeddings are L2-normalized, so inner product equals cosine similarity
+# and the index can skip the per-comparison norm computation
+_COLLECTION_METADATA = {"hnsw:space": "ip"}
+
+_NATIVE_METADATA_TYPES = (str, int, float, bool)
+
+# IDs per existence lookup or delete call, kept well below SQLite's bound-parameter limit
+_ID_LOOKUP_BATCH_SIZE = 500
+
+# Loads embedding models for databases created with load_in_background=True
+_MODEL_LOADER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-model")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_embedding_model(model_name: str, device: str, precision: str = "auto") -> SentenceTransformer:
+    """
+    Load a sentence-transformers model once per process.
+    
+    Every VectorDatabase using the same model, device and precision shares the
+    loaded weights, so opening further collections skips the reload.
+    
+    Args:
+        model_name: Name of the sentence-transformers model
+        device: Device to load the model on
+        precision: One of EMBEDDING_PRECISIONS
+    
+    Returns:
+        Loaded model; on CUDA 'auto' casts the weights to fp16, which roughly
+        doubles encoding throughput
+    """
+    print(f"Loading embedding model: {model_name} on {device} ({precision})")
+    model = SentenceTransformer(model_name, device=device)
+    if precision == "auto":
+        if device == "cuda":
+            model.half()
+    elif precision == "bf16":
+        model.to(torch.bfloat16)
+    elif precision == "int8":
+        # Dynamic quantization stores Linear weights as int8 and runs them with
+        # int8 CPU kernels; activations stay in floating point
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    print("Model loaded successfully!")
+    return model
+
 
 class VectorDatabase:
     """Manages embeddings and vector database operations using ChromaDB."""
@@ -31,7 +84,9 @@ class VectorDatabase:
         self,
         collection_name: str = "rag_documents",
         embedding_model: str = "all-MiniLM-L6-v2",
-        persist_directory: str = "./chroma_db"
+        persist_directory: Optional[str] = "./chroma_db",
+        precision: str = "auto",
+        load_in_background: bool = False
     ):
         """
         Initialize the vector database.
@@ -39,27 +94,78 @@ class VectorDatabase:
         Args:
             collection_name: Name of the ChromaDB collection
             embedding_model: Name of the sentence-transformers model
-            persist_directory: Directory to persist the database
+            persist_directory: Directory to persist the database, or None to
+                keep it in memory for the lifetime of the process
+            precision: Embedding model weight precision, one of EMBEDDING_PRECISIONS
+                ('int8' always runs on the CPU)
+            load_in_background: Load the embedding model in a background thread so
+                the caller can do other startup work meanwhile; the first use of
+                `embedding_model` waits for it (and raises any loading error)
         """
+        if precision not in EMBEDDING_PRECISIONS:
+            raise ValueError(
+                f"Unsupported embedding precision: {precision}. "
+                f"Choose one of: {', '.join(EMBEDDING_PRECISIONS)}"
+            )
+        
         self.collection_name = collection_name
+        self.precision = precision
         self.persist_directory = persist_directory
         
-        # Create persist directory if it doesn't exist
-        Path(persist_directory).mkdir(parents=True, exist_ok=True)
+        # Cached (document count, corpus centroid, sorted chunk-to-centroid
+        # similarities), replaced as a whole; the lock lets concurrent first
+        # callers share one scan of the collection
+        self._centroid_state: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+        self._centroid_lock = threading.Lock()
+        
+        # Bumped on every change to the collection, so caches derived from its
+        # contents (e.g. RAG answers) can tell stale entries apart
+        self.generation = 0
+        
+        # Repeated query strings skip the transformer forward pass, and exact or
+        # near-duplicate queries reuse the previous search results
+        self._encode_query = functools.lru_cache(maxsize=1024)(self._encode_query_uncached)
+        self.query_cache = SemanticCache(
+            embed_fn=self._encode_query,
+            similarity_threshold=0.97
+        )
         
         # Initialize ChromaDB client
-        print(f"Initializing ChromaDB at: {persist_directory}")
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False  # Disable telemetry to avoid error messages
-            )
+        settings = Settings(
+            anonymized_telemetry=False  # Disable telemetry to avoid error messages
         )
+        if persist_directory is None:
+            print("Initializing in-memory ChromaDB")
+            self.client = chromadb.EphemeralClient(settings=settings)
+        else:
+            # Create persist directory if it doesn't exist
+            Path(persist_directory).mkdir(parents=True, exist_ok=True)
+            
+            print(f"Initializing ChromaDB at: {persist_directory}")
+            self.client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=settings
+            )
         
-        # Load embedding model
-        print(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
-        print("Model loaded successfully!")
+        # Load embedding model on the fastest available device (shared with
+        # any other database in this process that uses the same model)
+        if precision == "int8":
+            self.device = "cpu"
+        elif torch.cuda.is_available():
+            self.device = "cuda"
+        elif torch.backends.mps.is_available():
+            self.device = "mps"
+        else:
+            self.device = "cpu"
+        if load_in_background:
+            self._embedding_model_future = _MODEL_LOADER.submit(
+                _load_embedding_model, embedding_model, self.device, precision
+            )
+        else:
+            self._embedding_model_future = Future()
+            self._embedding_model_future.set_result(
+                _load_embedding_model(embedding_model, self.device, precision)
+            )
         
         # Get or create collection
         try:
@@ -68,71 +174,284 @@ class VectorDatabase:
         except:
             self.collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=_COLLECTION_METADATA
             )
             print(f"Created new collection: {collection_name}")
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """The sentence-transformers model, waiting for a background load to finish."""
+        return self._embedding_model_future.result()
+    
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         """
-        Generate embeddings for a list of texts.
+        Generate L2-normalized embeddings for a list of texts.
         
         Args:
             texts: List of text strings
+            batch_size: Number of texts per forward pass of the model
+                (default: 256 on a GPU, 64 on CPU)
         
         Returns:
-            List of embedding vectors
+            Float32 array of embedding vectors, one row per text
         """
         print(f"Generating embeddings for {len(texts)} texts...")
-        embeddings = self.embedding_model.encode(
+        return self._encode(texts, batch_size, show_progress_bar=True)
+    
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None, show_progress_bar: bool = False) -> np.ndarray:
+        """Encode texts into normalized float32 embeddings."""
+        if batch_size is None:
+            batch_size = 64 if self.device == "cpu" else 256
+        
+        with torch.inference_mode():
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress_bar,
+                convert_to_numpy=True
+            )
+        
+        # Normalize after upcasting, so reduced-precision weights don't also
+        # cost precision in the stored unit vectors
+        embeddings = embeddings.astype(np.float32, copy=False)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+    
+    def tokenize(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Tokenize texts once with the model's fast (Rust) tokenizer.
+        
+        The returned arrays can be saved with np.save and reloaded with
+        np.load(..., mmap_mode='r'), so re-embedding an unchanged corpus skips
+        tokenization entirely.
+        
+        Args:
+            texts: List of text strings
+        
+        Returns:
+            Dictionary with 'input_ids' and 'attention_mask' arrays, padded to the longest text
+        """
+        encoded = self.embedding_model.tokenizer(
             texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
+            padding=True,
+            truncation=True,
+            max_length=self.embedding_model.max_seq_length,
+            return_tensors='np'
         )
-        return embeddings.tolist()
+        return {
+            'input_ids': encoded['input_ids'],
+            'attention_mask': encoded['attention_mask']
+        }
+    
+    def embed_pretokenized(
+        self,
+        input_ids: np.ndarray,
+        attention_mask: np.ndarray,
+        batch_size: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Generate L2-normalized embeddings from token ids produced by tokenize.
+        
+        Each batch is trimmed to its longest sequence before the forward pass,
+        and the model's own pooling modules are applied, so the result matches
+        generate_embeddings for the same texts.
+        
+        Args:
+            input_ids: Token id array, one row per text
+            attention_mask: Attention mask array matching input_ids
+            batch_size: Number of texts per forward pass of the model
+                (default: 256 on a GPU, 64 on CPU)
+        
+        Returns:
+            Float32 array of embedding vectors, one row per text
+        """
+        if batch_size is None:
+            batch_size = 64 if self.device == "cpu" else 256
+        
+        batches = []
+        with torch.inference_mode():
+            for i in range(0, len(input_ids), batch_size):
+                mask = np.asarray(attention_mask[i:i + batch_size])
+                length = max(int(mask.sum(axis=1).max()), 1)
+                features = {
+                    'input_ids': torch.from_numpy(np.ascontiguousarray(input_ids[i:i + batch_size, :length])).to(self.device),
+                    'attention_mask': torch.from_numpy(np.ascontiguousarray(mask[:, :length])).to(self.device)
+                }
+                embeddings = self.embedding_model(features)['sentence_embedding']
+                embeddings = torch.nn.functional.normalize(embeddings.float(), p=2, dim=1)
+                batches.append(embeddings.cpu().numpy())
+        
+        if not batches:
+            return np.zeros((0, self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.concatenate(batches)
     
-    def add_documents(self, chunks: List[Dict], batch_size: int = 100):
+    def add_documents(self, chunks: List[Dict], batch_size: int = 256):
         """
         Add document chunks to the vector database.
         
+        Chunk ids are derived from the chunk text, so chunks already in the
+        collection (e.g. when re-ingesting the same corpus) are skipped before
+        embedding. New chunks are embedded batch by batch while a background
+        thread writes the previous batch to the collection.
+        
+        Args:
+            chunks: List of chunk dictionaries with 'text' and metadata
+            batch_size: Number of documents embedded and written at once
+        """
+        self._add_documents(chunks, batch_size, pretokenize=False)
+    
+    def add_documents_pretokenized(self, chunks: List[Dict], batch_size: int = 256):
+        """
+        Add document chunks, tokenizing all new texts in a single call.
+        
+        Same as add_documents, but the tokenizer runs once over every new chunk
+        and each batch is sliced from the result (see embed_pretokenized), which
+        saves the per-call tokenizer overhead when adding many chunks at once.
+        
         Args:
             chunks: List of chunk dictionaries with 'text' and metadata
-            batch_size: Number of documents to process at once
+            batch_size: Number of documents embedded and written at once
         """
+        self._add_documents(chunks, batch_size, pretokenize=True)
+    
+    def _add_documents(self, chunks: List[Dict], batch_size: int, pretokenize: bool):
+        """Deduplicate, embed and store chunks; shared by the add_documents variants."""
         if not chunks:
             print("No chunks to add!")
             return
         
         print(f"\nAdding {len(chunks)} chunks to the database...")
         
-        # Process in batches
-        for i in tqdm(range(0, len(chunks), batch_size), desc="Processing batches"):
-            batch = chunks[i:i + batch_size]
-            
-            # Extract texts
-            texts = [chunk['text'] for chunk in batch]
-            
-            # Generate unique IDs
-            ids = [f"doc_{i+j}" for j in range(len(batch))]
-            
-            # Generate embeddings
-            embeddings = self.generate_embeddings(texts)
-            
-            # Prepare metadata
-            metadatas = []
-            for chunk in batch:
-                metadata = {k: str(v) for k, v in chunk.items() if k != 'text'}
-                metadatas.append(metadata)
-            
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas
-            )
+        # Content-addressed IDs; duplicates within this call keep the first chunk
+        chunks_by_id = {}
+        for chunk in chunks:
+            chunks_by_id.setdefault(self._chunk_id(chunk), chunk)
+        
+        existing = self._existing_ids(list(chunks_by_id))
+        new_ids = [chunk_id for chunk_id in chunks_by_id if chunk_id not in existing]
+        chunks = [chunks_by_id[chunk_id] for chunk_id in new_ids]
+        
+        skipped = len(chunks_by_id) - len(new_ids)
+        if skipped:
+            print(f"Skipping {skipped} chunks already in the database")
+        if not chunks:
+            print("No new chunks to add!")
+            return
+        
+        # Encode in order of length so each batch pads to similar lengths; ids and
+        # metadata travel with their texts, so nothing needs to be unsorted later
+        lengths = np.fromiter((len(chunk['text']) for chunk in chunks), dtype=np.int64, count=len(chunks))
+        order = np.argsort(lengths, kind='stable')
+        new_ids = [new_ids[i] for i in order]
+        chunks = [chunks[i] for i in order]
+        texts = [chunk['text'] for chunk in chunks]
+        
+        # Chroma stores str, int, float and bool metadata natively; anything else is stringified
+        metadatas = [
+            {k: v if isinstance(v, _NATIVE_METADATA_TYPES) else str(v) for k, v in chunk.items() if k != 'text'}
+            for chunk in chunks
+        ]
+        
+        # Encode batch k+1 here while the writer thread stores batch k
+        print(f"Generating embeddings for {len(texts)} texts...")
+        tokens = self.tokenize(texts) if pretokenize else None
+        batches = queue.Queue(maxsize=2)
+        write_errors = []
+        
+        def write_batches():
+            while True:
+                item = batches.get()
+                if item is None:
+                    return
+                if write_errors:
+                    # Keep draining so the producer never blocks on a full queue
+                    continue
+                ids, embeddings, documents, metadata_batch = item
+                try:
+                    self.collection.add(
+                        ids=ids,
+                        embeddings=embeddings.tolist(),
+                        documents=documents,
+                        metadatas=metadata_batch
+                    )
+                except Exception as e:
+                    write_errors.append(e)
+        
+        writer = threading.Thread(target=write_batches, daemon=True)
+        writer.start()
+        try:
+            for i in tqdm(range(0, len(chunks), batch_size), desc="Processing batches"):
+                if write_errors:
+                    break
+                batch_texts = texts[i:i + batch_size]
+                if tokens is not None:
+                    embeddings = self.embed_pretokenized(
+                        tokens['input_ids'][i:i + batch_size],
+                        tokens['attention_mask'][i:i + batch_size],
+                        batch_size=batch_size
+                    )
+                else:
+                    embeddings = self._encode(batch_texts)
+                batches.put((
+                    new_ids[i:i + batch_size],
+                    embeddings,
+                    batch_texts,
+                    metadatas[i:i + batch_size]
+                ))
+        finally:
+            batches.put(None)
+            writer.join()
+            self._invalidate_caches()
+        
+        if write_errors:
+            raise write_errors[0]
         
         print(f"Successfully added {len(chunks)} chunks to the database!")
     
+    def _encode_query_uncached(self, query_text: str) -> Tuple[float, ...]:
+        """Embed a single query; wrapped in an LRU cache as _encode_query."""
+        return tuple(self._encode([query_text])[0].tolist())
+    
+    def embed_query(self, query_text: str) -> np.ndarray:
+        """
+        Embed a single query through the LRU query-embedding cache.
+        
+        Args:
+            query_text: Query string
+        
+        Returns:
+            Normalized embedding vector
+        """
+        return np.asarray(self._encode_query(query_text), dtype=np.float32)
+    
+    def _invalidate_caches(self):
+        """Drop state derived from the collection's contents after it changes."""
+        self._centroid_state = None
+        self.query_cache.clear()
+        self.generation += 1
+    
+    @staticmethod
+    def _chunk_id(chunk: Dict) -> str:
+        """
+        Derive a stable ID from a chunk's text.
+        
+        Chunks of a hashed source file ('source_hash', plus 'source_dir' when
+        known) are scoped to that file, so a passage shared by two files is
+        stored once for each and removing one file leaves the other intact.
+        """
+        key = chunk['text']
+        if 'source_hash' in chunk:
+            key = f"{chunk.get('source_dir', '')}\0{chunk['source_hash']}\0{key}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    
+    def _existing_ids(self, ids: List[str]) -> Set[str]:
+        """Return the subset of IDs already stored, looked up in bounded slices."""
+        existing = set()
+        for i in range(0, len(ids), _ID_LOOKUP_BATCH_SIZE):
+            result = self.collection.get(ids=ids[i:i + _ID_LOOKUP_BATCH_SIZE], include=[])
+            existing.update(result['ids'])
+        return existing
+    
     def query(
         self,
         query_text: str,
@@ -141,6 +460,9 @@ class VectorDatabase:
         """
         Query the vector database for similar documents.
         
+        Results are cached until the collection changes, so repeated and
+        near-duplicate queries skip both the embedding and the vector search.
+        
         Args:
             query_text: The search query
             n_results: Number of results to return
@@ -148,10 +470,14 @@ class VectorDatabase:
         Returns:
             Dictionary containing results with documents, distances, and metadata
         """
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query_text])[0].tolist()
-        
-        # Query the collection
+        return self.query_cache.get_or_compute(
+            query_text,
+            lambda: self._search(list(self._encode_query(query_text)), n_results),
+            namespace=str(n_results)
+        )
+    
+    def _search(self, query_embedding: List[float], n_results: int) -> Dict:
+        """Run a nearest-neighbour search for an embedded query."""
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results
@@ -164,6 +490,91 @@ class VectorDatabase:
             'ids': results['ids'][0]
         }
     
+    def _get_centroid_state(self) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        """Return the cached centroid state, recomputing it if the collection changed."""
+        with self._centroid_lock:
+            count = self.collection.count()
+            if count == 0:
+                return None
+            
+            state = self._centroid_state
+            if state is None or state[0] != count:
+                embeddings = np.asarray(
+                    self.collection.get(include=['embeddings'])['embeddings'],
+                    dtype=np.float32
+                )
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                embeddings = embeddings / np.maximum(norms, 1e-12)
+                centroid = embeddings.mean(axis=0)
+                centroid = centroid / max(float(np.linalg.norm(centroid)), 1e-12)
+                state = self._centroid_state = (count, centroid, np.sort(embeddings @ centroid))
+            return state
+    
+    def get_centroid(self) -> Optional[np.ndarray]:
+        """
+        Get the unit-length mean of the collection's normalized embeddings.
+        
+        The centroid is cached and only recomputed when the collection changes.
+        
+        Returns:
+            Centroid vector, or None if the collection is empty
+        """
+        state = self._get_centroid_state()
+        return None if state is None else state[1]
+    
+    def get_coverage_reference(self, quantile: float) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Get the centroid together with a quantile of the chunk-to-centroid similarities.
+        
+        Both come from the same cached computation, so they always describe the
+        same version of the collection.
+        
+        Args:
+            quantile: Quantile in [0, 1]
+        
+        Returns:
+            (centroid, similarity at that quantile), or None if the collection is empty
+        """
+        state = self._get_centroid_state()
+        if state is None:
+            return None
+        _, centroid, similarities = state
+        return centroid, float(np.quantile(similarities, quantile))
+    
+    def get_metadatas(self, where: Optional[Dict] = None) -> Dict[str, Dict]:
+        """
+        Get the metadata of stored chunks, without their texts or embeddings.
+        
+        Args:
+            where: Optional metadata filter restricting which chunks are returned
+        
+        Returns:
+            Dictionary mapping chunk IDs to their metadata
+        """
+        result = self.collection.get(where=where, include=['metadatas'])
+        return {chunk_id: metadata or {} for chunk_id, metadata in zip(result['ids'], result['metadatas'])}
+    
+    def delete(self, where: Optional[Dict] = None, ids: Optional[List[str]] = None):
+        """
+        Delete chunks by ID and/or metadata filter.
+        
+        IDs are deleted in bounded slices, like the lookups in _existing_ids.
+        
+        Args:
+            where: Metadata filter, e.g. {"source_hash": "..."}
+            ids: Chunk IDs
+        """
+        if where is None and not ids:
+            return
+        try:
+            if ids:
+                for i in range(0, len(ids), _ID_LOOKUP_BATCH_SIZE):
+                    self.collection.delete(ids=ids[i:i + _ID_LOOKUP_BATCH_SIZE], where=where)
+            else:
+                self.collection.delete(where=where)
+        finally:
+            self._invalidate_caches()
+    
     def get_collection_stats(self) -> Dict:
         """
         Get statistics about the collection.
@@ -192,8 +603,9 @@ class VectorDatabase:
         
         self.collection = self.client.create_collection(
             name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=_COLLECTION_METADATA
         )
+        self._invalidate_caches()
         print(f"Reset collection: {self.collection_name}")
 
 
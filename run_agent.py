@@ -6,25 +6,96 @@ Main entry point for the agentic educational assistant.
 
 import os
 import sys
+import hashlib
 import argparse
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables once, before any LLM client or API key check
+load_dotenv()
 
 # Add modules to path
 sys.path.append(str(Path(__file__).parent))
 
-from agent import AgenticSystem
-from modules.vector_database import VectorDatabase
-from modules.text_chunker import TextChunker
-from modules.pdf_loader import PDFLoader
+from modules.embedding_precision import EMBEDDING_PRECISIONS
+
+# The agent and its modules pull in torch, chromadb and the LLM SDKs, so they are
+# imported where they are used; `--help` and argument errors stay fast
+if TYPE_CHECKING:
+    from modules.vector_database import VectorDatabase
+
+# Embedding batches per add_documents_pretokenized call while building the knowledge base
+_SORT_WINDOW_BATCHES = 8
+
+# PDFs submitted for extraction per worker process ahead of the embedding thread
+_IN_FLIGHT_PER_WORKER = 2
+
+
+def _file_hash(path: Path) -> str:
+    """Hash a file's contents in blocks; used to detect unchanged PDFs between runs."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
 
 
-def setup_knowledge_base(data_dir: str, collection_name: str = "agent_kb"):
+def _extract_and_chunk(pdf_path: str, chunk_size: int, chunk_overlap: int, source_hash: str, source_dir: str) -> List[Dict]:
+    """
+    Extract and chunk a single PDF (runs in a worker process).
+    
+    Args:
+        pdf_path: Path to the PDF file
+        chunk_size: Maximum size of each chunk in characters
+        chunk_overlap: Number of overlapping characters between chunks
+        source_hash: Content hash of the file, stored with every chunk
+        source_dir: Resolved data directory the file was found in, stored with every chunk
+        
+    Returns:
+        List of chunk dictionaries
+    """
+    from modules.text_chunker import TextChunker
+    from modules.pdf_loader import PDFLoader
+    
+    # Read the file in one go and parse it from memory
+    path = Path(pdf_path)
+    text = PDFLoader.from_bytes(path.read_bytes(), name=path.name).extract_text()
+    text_chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = text_chunker.chunk_text(
+        text,
+        metadata={'source': path.name, 'type': 'pdf', 'source_hash': source_hash, 'source_dir': source_dir}
+    )
+    
+    # Number of chunks the database will hold for this file (repeated passages
+    # share an ID), so later runs can tell a fully stored file from a partial one
+    source_chunks = len({chunk['text'] for chunk in chunks})
+    for chunk in chunks:
+        chunk['source_chunks'] = source_chunks
+    return chunks
+
+
+def setup_knowledge_base(
+    data_dir: str,
+    collection_name: str = "agent_kb",
+    embed_batch_size: int = 32,
+    vector_db: Optional["VectorDatabase"] = None,
+    stop_event: Optional[threading.Event] = None
+):
     """
     Setup the knowledge base from data directory.
     
     Args:
         data_dir: Directory containing PDF files
         collection_name: Name for the vector database collection
+        embed_batch_size: Number of chunks per embedding forward pass and collection write
+        vector_db: Existing database to fill (default: open collection_name)
+        stop_event: Set to abandon the build early; chunks stored so far are kept
+            and the next run completes the partially stored files
         
     Returns:
         VectorDatabase instance
@@ -33,18 +104,19 @@ def setup_knowledge_base(data_dir: str, collection_name: str = "agent_kb"):
     print("SETTING UP KNOWLEDGE BASE")
     print("="*80)
     
+    if vector_db is None:
+        from modules.vector_database import VectorDatabase
+        vector_db = VectorDatabase(collection_name=collection_name)
+    
     data_path = Path(data_dir)
     if not data_path.exists():
         print(f"⚠️  Warning: Data directory not found: {data_dir}")
         print("Creating empty knowledge base...")
-        return VectorDatabase(collection_name=collection_name)
-    
-    # Initialize components
-    vector_db = VectorDatabase(collection_name=collection_name)
-    text_chunker = TextChunker(chunk_size=1000, chunk_overlap=200)
+        return vector_db
     
-    # Process all PDFs
-    pdf_files = list(data_path.glob("*.pdf"))
+    # Process all PDFs; one directory scan, matching the extension in any case
+    with os.scandir(data_path) as it:
+        pdf_files = [Path(entry.path) for entry in it if entry.is_file() and entry.name.lower().endswith(".pdf")]
     
     if not pdf_files:
         print(f"⚠️  No PDF files found in {data_dir}")
@@ -53,25 +125,143 @@ def setup_knowledge_base(data_dir: str, collection_name: str = "agent_kb"):
     
     print(f"\nFound {len(pdf_files)} PDF files")
     
-    all_chunks = []
-    for pdf_file in pdf_files:
-        print(f"  Processing: {pdf_file.name}")
-        try:
-            loader = PDFLoader(str(pdf_file))
-            text = loader.extract_text()
+    # Skip PDFs whose exact contents are already fully stored, and drop chunks of
+    # PDFs in this directory that were changed or removed since the last run
+    source_dir = str(data_path.resolve())
+    file_hashes = {pdf_file: _file_hash(pdf_file) for pdf_file in pdf_files}
+    current_hashes = set(file_hashes.values())
+    current_names = {pdf_file.name for pdf_file in pdf_files}
+    
+    stored_counts: Dict[str, int] = {}
+    expected_counts: Dict[str, int] = {}
+    stale_ids = []
+    for chunk_id, metadata in vector_db.get_metadatas(where={'type': 'pdf'}).items():
+        if 'source_dir' not in metadata:
+            # Stored before chunks recorded their file; replaced if that file is here
+            if metadata.get('source') in current_names:
+                stale_ids.append(chunk_id)
+            continue
+        if metadata['source_dir'] != source_dir:
+            continue
+        source_hash = metadata.get('source_hash')
+        if source_hash not in current_hashes:
+            stale_ids.append(chunk_id)
+            continue
+        stored_counts[source_hash] = stored_counts.get(source_hash, 0) + 1
+        expected_counts[source_hash] = metadata.get('source_chunks')
+    
+    if stale_ids:
+        vector_db.delete(ids=stale_ids)
+        print(f"Removed {len(stale_ids)} chunks of changed or deleted PDF files")
+    
+    # A file interrupted mid-build has fewer chunks stored than it produces; it is
+    # processed again and only its missing chunks are added
+    complete_hashes = {
+        source_hash for source_hash, count in stored_counts.items()
+        if count == expected_counts[source_hash]
+    }
+    pdf_files = [pdf_file for pdf_file in pdf_files if file_hashes[pdf_file] not in complete_hashes]
+    if not pdf_files:
+        stats = vector_db.get_collection_stats()
+        print(f"✓ Knowledge base up to date with {stats['total_documents']} documents")
+        print("="*80 + "\n")
+        return vector_db
+    print(f"{len(pdf_files)} new or changed PDF files to process")
+    
+    if stop_event is None:
+        stop_event = threading.Event()
+    
+    # PDFs are independent and extraction is CPU-bound, so process them in parallel.
+    # An embedding thread stores finished chunks while the rest are still being
+    # extracted; the bounded queue and submission window keep memory in check
+    chunk_queue = queue.Queue(maxsize=4)
+    embed_errors = []
+    
+    # Chunks are added several batches at a time: the database sorts each call's
+    # chunks by length before batching, so each batch pads to similar lengths, and
+    # tokenizes them all in one call
+    flush_size = embed_batch_size * _SORT_WINDOW_BATCHES
+    
+    def embed_chunks():
+        # Chunks are at most 1000 characters and fewer than flush_size are left
+        # pending after each flush, which bounds the text held here
+        pending_chunks = []
+        while True:
+            chunks = chunk_queue.get()
+            if chunks is None:
+                break
+            if embed_errors or stop_event.is_set():
+                # Keep draining so the extraction loop never blocks on a full queue
+                continue
+            pending_chunks.extend(chunks)
+            try:
+                while len(pending_chunks) >= flush_size:
+                    vector_db.add_documents_pretokenized(pending_chunks[:flush_size], batch_size=embed_batch_size)
+                    del pending_chunks[:flush_size]
+            except Exception as e:
+                embed_errors.append(e)
+        
+        if pending_chunks and not embed_errors and not stop_event.is_set():
+            try:
+                vector_db.add_documents_pretokenized(pending_chunks, batch_size=embed_batch_size)
+            except Exception as e:
+                embed_errors.append(e)
+    
+    from modules.pdf_loader import process_pool_context
+    
+    embedder = threading.Thread(target=embed_chunks, daemon=True)
+    embedder.start()
+    total_chunks = 0
+    workers = min(os.cpu_count() or 1, len(pdf_files))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context()) as executor:
+            # Only a few PDFs are in flight at a time, so finished-but-unstored
+            # chunks never pile up in memory while embedding is the bottleneck
+            remaining = iter(pdf_files)
+            futures = {}
             
-            chunks = text_chunker.chunk_text(
-                text,
-                metadata={'source': pdf_file.name, 'type': 'pdf'}
-            )
-            all_chunks.extend(chunks)
-            print(f"    ✓ Created {len(chunks)} chunks")
-        except Exception as e:
-            print(f"    ✗ Error: {e}")
-    
-    if all_chunks:
-        print(f"\nAdding {len(all_chunks)} chunks to knowledge base...")
-        vector_db.add_documents(all_chunks)
+            def submit_next():
+                pdf_file = next(remaining, None)
+                if pdf_file is not None:
+                    future = executor.submit(
+                        _extract_and_chunk, str(pdf_file), 1000, 200, file_hashes[pdf_file], source_dir
+                    )
+                    futures[future] = pdf_file
+            
+            for _ in range(workers * _IN_FLIGHT_PER_WORKER):
+                submit_next()
+            
+            while futures and not embed_errors and not stop_event.is_set():
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_file = futures.pop(future)
+                    submit_next()
+                    print(f"  Processed: {pdf_file.name}")
+                    error = future.exception()
+                    if error is not None:
+                        print(f"    ✗ Error: {error}")
+                        continue
+                    
+                    chunks = future.result()
+                    total_chunks += len(chunks)
+                    print(f"    ✓ Created {len(chunks)} chunks")
+                    chunk_queue.put(chunks)
+            
+            if embed_errors or stop_event.is_set():
+                for future in futures:
+                    future.cancel()
+    finally:
+        chunk_queue.put(None)
+        embedder.join()
+    
+    if embed_errors:
+        raise embed_errors[0]
+    if stop_event.is_set():
+        print("Knowledge base build stopped early")
+        return vector_db
+    
+    if total_chunks:
+        print(f"\nAdded {total_chunks} chunks to knowledge base")
         stats = vector_db.get_collection_stats()
         print(f"✓ Knowledge base ready with {stats['total_documents']} documents")
     
@@ -136,6 +326,22 @@ Examples:
         help='LLM temperature (default: 0.7)'
     )
     
+    parser.add_argument(
+        '--embed-batch-size',
+        type=int,
+        default=32,
+        help='Chunks per embedding batch while building the knowledge base (default: 32)'
+    )
+    
+    parser.add_argument(
+        '--embed-precision',
+        type=str,
+        default='auto',
+        choices=EMBEDDING_PRECISIONS,
+        help='Embedding model weight precision; int8 runs on the CPU '
+             '(default: auto, fp16 on CUDA and fp32 elsewhere)'
+    )
+    
     args = parser.parse_args()
     
     # Check for API keys
@@ -152,16 +358,44 @@ Examples:
         sys.exit(1)
     
     try:
-        # Setup knowledge base
-        vector_db = setup_knowledge_base(args.data_dir, args.collection)
+        from agent import AgenticSystem
+        from modules.vector_database import VectorDatabase
         
-        # Initialize agent
-        agent = AgenticSystem(
-            vector_db=vector_db,
-            llm_provider=args.llm,
-            model_name=args.model,
-            temperature=args.temperature
+        # The agent only keeps a reference to the database, so the embedding model
+        # loads and the knowledge base is built in the background while the LLM
+        # clients are initialized
+        vector_db = VectorDatabase(
+            collection_name=args.collection,
+            precision=args.embed_precision,
+            load_in_background=True
         )
+        stop_build = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            kb_future = executor.submit(
+                setup_knowledge_base,
+                args.data_dir,
+                args.collection,
+                args.embed_batch_size,
+                vector_db,
+                stop_build
+            )
+            
+            # Initialize agent; if that fails, abandon the build rather than
+            # waiting for it to finish on the way out
+            try:
+                agent = AgenticSystem(
+                    vector_db=vector_db,
+                    llm_provider=args.llm,
+                    model_name=args.model,
+                    temperature=args.temperature
+                )
+            except BaseException:
+                kb_future.cancel()
+                stop_build.set()
+                raise
+            
+            # Wait for the knowledge base before taking any questions
+            kb_future.result()
         
         # Start interactive mode
         agent.interactive_mode()
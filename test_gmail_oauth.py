@@ -9,7 +9,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
-from modules.email_tool import EmailSenderTool
+CREDS = Path("credentials.json")
+TOKEN = Path("token.json")
 
 def test_gmail_oauth():
     """Test Gmail OAuth2 authentication."""
@@ -17,24 +18,25 @@ def test_gmail_oauth():
     print("TESTING GMAIL OAUTH2 SETUP")
     print("="*80 + "\n")
     
+    # Check the credentials file first, before loading the Gmail API client
+    if not CREDS.is_file():
+        print(f"❌ ERROR: {CREDS} not found!")
+        print("Please download OAuth2 credentials from Google Cloud Console.")
+        print("See README.md for setup instructions.")
+        return False
+    
+    print(f"✓ {CREDS} found")
+    
     try:
+        from modules.email_tool import EmailSenderTool
+        
         # Initialize the email tool
-        print("Initializing Gmail API email tool...")
-        email_tool = EmailSenderTool()
+        print("\nInitializing Gmail API email tool...")
+        email_tool = EmailSenderTool(credentials_path=str(CREDS), token_path=str(TOKEN))
         
         print("✓ Email tool initialized successfully")
-        print("\nCredentials file: credentials.json")
-        print("Token will be saved to: token.json")
-        
-        # Check if credentials file exists
-        import os
-        if not os.path.exists("credentials.json"):
-            print("\n❌ ERROR: credentials.json not found!")
-            print("Please download OAuth2 credentials from Google Cloud Console.")
-            print("See README.md for setup instructions.")
-            return False
-        
-        print("\n✓ credentials.json found")
+        print(f"\nCredentials file: {CREDS}")
+        print(f"Token will be saved to: {TOKEN}")
         
         # Test authentication (this will open browser if not already authenticated)
         print("\n📝 Testing Gmail API authentication...")
@@ -42,7 +44,7 @@ def test_gmail_oauth():
         
         service = email_tool._get_gmail_service()
         print("\n✓ Gmail API authentication successful!")
-        print("✓ token.json has been created/updated")
+        print(f"✓ {TOKEN} has been created/updated")
         
         print("\n" + "="*80)
         print("GMAIL OAUTH2 SETUP COMPLETE")
@@ -2,9 +2,42 @@
 Test Script - Verify RAG Pipeline Components
 """
 
+import importlib.util
+import os
 import sys
 from pathlib import Path
 
+try:
+    from dotenv import load_dotenv
+    _DOTENV_AVAILABLE = True
+except ImportError:
+    _DOTENV_AVAILABLE = False
+
+# Read .env once; every test sees the same environment. Without python-dotenv
+# only the process environment is used, and the requirements test reports it
+if _DOTENV_AVAILABLE:
+    load_dotenv()
+
+_KEYS = {name: os.getenv(name) for name in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GOOGLE_API_KEY")}
+
+# Values shipped in .env.example that do not count as configured keys
+_PLACEHOLDER_KEYS = frozenset({
+    "your_openai_api_key_here",
+    "your_anthropic_api_key_here",
+    "your_google_api_key_here",
+})
+
+_AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.flac', '.ogg'})
+
+
+def _list_files(directory: Path):
+    """List the files in a directory with one scan; empty if it doesn't exist."""
+    if not directory.is_dir():
+        return []
+    with os.scandir(directory) as it:
+        return [Path(entry.path) for entry in it if entry.is_file()]
+
+
 def test_imports():
     """Test 1: Verify all imports work."""
     print("\n" + "="*80)
@@ -65,10 +98,10 @@ def test_vector_database():
     try:
         from modules.vector_database import VectorDatabase
         
-        # Create test database
+        # Create test database in memory; nothing to clean up on disk
         db = VectorDatabase(
             collection_name="test_collection",
-            persist_directory="./test_chroma_db"
+            persist_directory=None
         )
         
         # Add test documents
@@ -84,14 +117,6 @@ def test_vector_database():
         results = db.query("programming", n_results=1)
         print(f"✓ Query successful: found {len(results['documents'])} results")
         
-        # Cleanup
-        db.delete_collection()
-        print("✓ Collection deleted")
-        
-        # Clean up directory
-        import shutil
-        shutil.rmtree("./test_chroma_db", ignore_errors=True)
-        
         return True
         
     except Exception as e:
@@ -105,33 +130,27 @@ def test_environment_variables():
     print("Test 4: Testing Environment Variables")
     print("="*80)
     
-    import os
-    from dotenv import load_dotenv
-    
-    load_dotenv()
+    configured = {
+        name: bool(value) and value not in _PLACEHOLDER_KEYS
+        for name, value in _KEYS.items()
+    }
     
-    openai_key = os.getenv("OPENAI_API_KEY")
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY")
-    google_key = os.getenv("GOOGLE_API_KEY")
-    
-    if openai_key and openai_key != "your_openai_api_key_here":
+    if configured["OPENAI_API_KEY"]:
         print("✓ OpenAI API key found")
     else:
         print("⚠️  OpenAI API key not configured")
     
-    if anthropic_key and anthropic_key != "your_anthropic_api_key_here":
+    if configured["ANTHROPIC_API_KEY"]:
         print("✓ Anthropic API key found")
     else:
         print("⚠️  Anthropic API key not configured")
     
-    if google_key and google_key != "your_google_api_key_here":
+    if configured["GOOGLE_API_KEY"]:
         print("✓ Google Gemini API key found")
     else:
         print("⚠️  Google Gemini API key not configured")
     
-    if (openai_key and openai_key != "your_openai_api_key_here") or \
-       (anthropic_key and anthropic_key != "your_anthropic_api_key_here") or \
-       (google_key and google_key != "your_google_api_key_here"):
+    if any(configured.values()):
         print("\n✓ At least one LLM API key configured")
         return True
     else:
@@ -153,10 +172,10 @@ def test_data_directory():
         print("❌ Data directory not found")
         return False
     
-    pdf_files = list(data_dir.glob("*.pdf"))
-    audio_files = []
-    for ext in ['.mp3', '.wav', '.m4a', '.flac', '.ogg']:
-        audio_files.extend(data_dir.glob(f"*{ext}"))
+    # One directory scan for both file kinds; extensions match in any case
+    files = _list_files(data_dir)
+    pdf_files = [path for path in files if path.suffix.lower() == ".pdf"]
+    audio_files = [path for path in files if path.suffix.lower() in _AUDIO_EXTENSIONS]
     
     print(f"✓ Data directory exists")
     print(f"  Found {len(pdf_files)} PDF files")
@@ -184,7 +203,7 @@ def test_pdf_loader():
     print("="*80)
     
     data_dir = Path("data")
-    pdf_files = list(data_dir.glob("*.pdf"))
+    pdf_files = [path for path in _list_files(data_dir) if path.suffix.lower() == ".pdf"]
     
     if not pdf_files:
         print("⚠️  No PDF files to test")
@@ -233,15 +252,16 @@ def test_system_requirements():
         'sentence_transformers',
         'langchain',
         'openai',
-        'anthropic'
+        'anthropic',
+        'dotenv'
     ]
     
     missing = []
     for package in packages:
-        try:
-            __import__(package)
+        # Locate the package without importing it; torch alone takes seconds to import
+        if importlib.util.find_spec(package) is not None:
             print(f"✓ {package} installed")
-        except ImportError:
+        else:
             print(f"❌ {package} not installed")
             missing.append(package)
     
@@ -253,6 +273,281 @@ def test_system_requirements():
     return True
 
 
+def test_content_batching():
+    """Test 8: Concurrent identical content requests share one LLM call."""
+    print("\n" + "="*80)
+    print("Test 8: Testing Content Batching")
+    print("="*80)
+    
+    try:
+        import asyncio
+        from types import SimpleNamespace
+        from modules.content_tools import BlogPostGeneratorTool, LLMProxy
+        
+        calls = []
+        
+        # OpenAI-shaped async client that records the `n` of every request
+        class FakeCompletions:
+            async def create(self, n=1, **kwargs):
+                calls.append(n)
+                return SimpleNamespace(choices=[
+                    SimpleNamespace(message=SimpleNamespace(content=f"Post {i}"))
+                    for i in range(n)
+                ])
+        
+        client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+        tool = BlogPostGeneratorTool(LLMProxy(client, "openai", "test-model", async_llm_client=client))
+        
+        # Unsaved content is not streamed, so it goes through the batch executor
+        async def generate_twice():
+            return await asyncio.gather(*(
+                tool.aexecute("testing", save_to_file=False) for _ in range(2)
+            ))
+        
+        results = asyncio.run(generate_twice())
+        assert all(result["success"] for result in results), results
+        assert calls == [2], f"expected one request with n=2, got {calls}"
+        print("✓ Two identical requests sent as one API call")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Content batching test failed: {e}")
+        return False
+
+
+def test_caches():
+    """Test 9: Test the semantic answer cache and the persistent content cache."""
+    print("\n" + "="*80)
+    print("Test 9: Testing Caches")
+    print("="*80)
+    
+    try:
+        import sqlite3
+        import tempfile
+        import time
+        import numpy as np
+        from modules.semantic_cache import ContentCache, SemanticCache
+        
+        # Letter counts are a cheap embedding under which spelling variants stay close
+        def embed(text):
+            return np.array([text.count(c) for c in "abcdefghijklmnopqrstuvwxyz"], dtype=np.float32)
+        
+        calls = []
+        
+        def compute(value):
+            def _compute():
+                calls.append(value)
+                return value
+            return _compute
+        
+        cache = SemanticCache(embed_fn=embed, max_entries=2)
+        assert cache.get_or_compute("Neural networks", compute("a")) == "a"
+        assert cache.get_or_compute("  neural   NETWORKS ", compute("b")) == "a"
+        assert cache.get_or_compute("neural network", compute("c")) == "a"
+        assert cache.get_or_compute("neural networks", compute("d"), namespace="other") == "d"
+        assert calls == ["a", "d"], calls
+        assert (cache.hits, cache.near_hits, cache.misses) == (1, 1, 2)
+        print("✓ SemanticCache: exact, near and namespaced lookups")
+        
+        # The entry for "Neural networks" is the oldest and is evicted
+        cache.get_or_compute("gardening tips", compute("e"))
+        assert cache.get_stats()['entries'] == 2
+        assert cache.get_or_compute("neural networks", compute("f")) == "f"
+        
+        assert cache.get_or_compute("failure", compute(""), should_cache=bool) == ""
+        assert cache.get_or_compute("failure", compute("g"), should_cache=bool) == "g"
+        
+        short_lived = SemanticCache(embed_fn=embed, ttl_seconds=0.05)
+        short_lived.get_or_compute("deep learning", compute("h"))
+        time.sleep(0.1)
+        assert short_lived.get_or_compute("deep learning", compute("i")) == "i"
+        print("✓ SemanticCache: max_entries, should_cache and TTL")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "content_cache.db")
+            
+            content_cache = ContentCache(db_path=db_path, embed_fn=embed, max_entries=2)
+            content_cache.put("Neural networks", "report", context="ctx")
+            assert content_cache.get("neural  networks", context="ctx") == "report"
+            assert content_cache.get("neural network", context="ctx") == "report"
+            assert content_cache.get("neural networks", context="other ctx") is None
+            assert content_cache.get("neural networks", context="ctx", namespace="pdf") is None
+            
+            content_cache.put("gardening tips", "guide")
+            content_cache.put("deep learning", "tutorial")
+            assert content_cache.get_stats()['entries'] == 2
+            assert content_cache.get("neural networks", context="ctx") is None
+            
+            short_lived = ContentCache(db_path=str(Path(tmp) / "short.db"), ttl_seconds=0.05)
+            short_lived.put("deep learning", "tutorial")
+            time.sleep(0.1)
+            assert short_lived.get("deep learning") is None
+            print("✓ ContentCache: exact, near and context-scoped lookups, max_entries and TTL")
+            
+            # A cache file from an older schema is rebuilt instead of failing
+            legacy_path = str(Path(tmp) / "legacy.db")
+            with sqlite3.connect(legacy_path) as conn:
+                conn.execute("CREATE TABLE content_cache (prompt_key TEXT PRIMARY KEY, content TEXT)")
+                conn.execute("INSERT INTO content_cache VALUES ('key', 'stale')")
+            conn.close()
+            rebuilt = ContentCache(db_path=legacy_path)
+            assert rebuilt.get_stats()['entries'] == 0
+            rebuilt.put("deep learning", "tutorial")
+            assert rebuilt.get("deep learning") == "tutorial"
+            print("✓ ContentCache: old schema rebuilt")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Cache test failed: {e!r}")
+        return False
+
+
+def test_content_helpers():
+    """Test 10: Test inline markdown conversion and LLM retry classification."""
+    print("\n" + "="*80)
+    print("Test 10: Testing Content Helpers")
+    print("="*80)
+    
+    try:
+        import httpx
+        from modules.content_tools import _is_transient_llm_error, _md_inline_to_html
+        
+        html = _md_inline_to_html("**Bold** and *italic* with `a*b*c` in snake_case_name")
+        assert html == "<strong>Bold</strong> and <em>italic</em> with <code>a*b*c</code> in snake_case_name", html
+        html = _md_inline_to_html("[**Docs**](https://example.com/a_b)")
+        assert html == '<a href="https://example.com/a_b" target="_blank"><strong>Docs</strong></a>', html
+        pdf_markup = _md_inline_to_html("__Bold__ _italic_ `code` [docs](https://example.com)", "reportlab")
+        assert pdf_markup == '<b>Bold</b> <i>italic</i> <font name="Courier">code</font> [docs](https://example.com)', pdf_markup
+        assert _md_inline_to_html("2 * 3 * 4") == "2 * 3 * 4"
+        print("✓ Inline markdown converted for HTML and reportlab")
+        
+        def error_with(**attributes):
+            error = Exception("LLM call failed")
+            error.__dict__.update(attributes)
+            return error
+        
+        assert _is_transient_llm_error(error_with(status_code=429))
+        assert _is_transient_llm_error(error_with(status_code=503))
+        assert not _is_transient_llm_error(error_with(status_code=400))
+        assert _is_transient_llm_error(error_with(code=500))
+        assert not _is_transient_llm_error(error_with(code="invalid_argument"))
+        assert not _is_transient_llm_error(ValueError("bad prompt"))
+        try:
+            try:
+                raise httpx.ConnectTimeout("timed out")
+            except httpx.ConnectTimeout as timeout:
+                raise RuntimeError("request failed") from timeout
+        except RuntimeError as wrapped:
+            assert _is_transient_llm_error(wrapped)
+        print("✓ Rate limits, server errors and timeouts retried; client errors not")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Content helper test failed: {e!r}")
+        return False
+
+
+def test_email_validation():
+    """Test 11: Test recipient address validation."""
+    print("\n" + "="*80)
+    print("Test 11: Testing Email Validation")
+    print("="*80)
+    
+    try:
+        from modules.email_tool import EmailSenderTool
+        
+        tool = EmailSenderTool()
+        for address in ("user@example.com", "first.last+news@mail.example.co.uk"):
+            assert tool._is_valid_email(address), address
+        for address in (
+            "user@example.com\n",
+            "user@example.com, other@example.com",
+            "Name <user@example.com>",
+            "user@example",
+            "",
+            None,
+        ):
+            assert not tool._is_valid_email(address), repr(address)
+        print("✓ Only complete single addresses accepted")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Email validation test failed: {e!r}")
+        return False
+
+
+def test_knowledge_base_updates():
+    """Test 12: Test chunk IDs and incremental knowledge base builds."""
+    print("\n" + "="*80)
+    print("Test 12: Testing Knowledge Base Updates")
+    print("="*80)
+    
+    try:
+        import tempfile
+        from reportlab.lib.pagesizes import letter
+        from reportlab.pdfgen import canvas
+        from modules.vector_database import VectorDatabase
+        from run_agent import setup_knowledge_base
+        
+        chunk = {'text': 'Shared passage', 'source_hash': 'a1', 'source_dir': '/data'}
+        chunk_id = VectorDatabase._chunk_id
+        assert chunk_id(chunk) == chunk_id(dict(chunk, source='a.pdf'))
+        assert chunk_id(chunk) != chunk_id(dict(chunk, source_hash='b2'))
+        assert chunk_id(chunk) != chunk_id(dict(chunk, source_dir='/other'))
+        assert chunk_id({'text': 'Shared passage'}) == chunk_id({'text': 'Shared passage', 'source': 'x'})
+        print("✓ Chunk IDs follow the text and its source file")
+        
+        def write_pdf(path, topic):
+            pdf = canvas.Canvas(str(path), pagesize=letter)
+            text = pdf.beginText(72, 720)
+            for i in range(40):
+                text.textLine(f"Line {i} of the {topic} document, long enough to need several chunks.")
+            pdf.drawText(text)
+            pdf.save()
+        
+        def stored_ids(db):
+            ids_by_source = {}
+            for stored_id, metadata in db.get_metadatas(where={'type': 'pdf'}).items():
+                ids_by_source.setdefault(metadata['source'], set()).add(stored_id)
+            return ids_by_source
+        
+        db = VectorDatabase(collection_name="test_kb_updates", persist_directory=None)
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            write_pdf(data_dir / "a.pdf", "alpha")
+            write_pdf(data_dir / "b.pdf", "beta")
+            
+            setup_knowledge_base(tmp, vector_db=db)
+            built = stored_ids(db)
+            assert set(built) == {"a.pdf", "b.pdf"} and all(len(ids) > 1 for ids in built.values()), built
+            for metadata in db.get_metadatas(where={'type': 'pdf'}).values():
+                assert metadata['source_chunks'] == len(built[metadata['source']]), metadata
+            
+            setup_knowledge_base(tmp, vector_db=db)
+            assert stored_ids(db) == built
+            print("✓ Unchanged files are skipped")
+            
+            # A file with chunks missing (e.g. an interrupted build) is completed
+            db.delete(ids=[next(iter(built["a.pdf"]))])
+            setup_knowledge_base(tmp, vector_db=db)
+            assert stored_ids(db) == built
+            print("✓ Partially stored files are completed")
+            
+            write_pdf(data_dir / "b.pdf", "gamma")
+            (data_dir / "a.pdf").unlink()
+            setup_knowledge_base(tmp, vector_db=db)
+            updated = stored_ids(db)
+            assert set(updated) == {"b.pdf"} and not updated["b.pdf"] & built["b.pdf"], updated
+            print("✓ Chunks of changed and removed files are replaced")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Knowledge base update test failed: {e!r}")
+        return False
+
+
 def run_all_tests():
     """Run all tests."""
     print("\n" + "="*80)
@@ -267,6 +562,11 @@ def run_all_tests():
         ("Environment Variables", test_environment_variables),
         ("Data Directory", test_data_directory),
         ("PDF Loader", test_pdf_loader),
+        ("Content Batching", test_content_batching),
+        ("Caches", test_caches),
+        ("Content Helpers", test_content_helpers),
+        ("Email Validation", test_email_validation),
+        ("Knowledge Base Updates", test_knowledge_base_updates),
     ]
     
     results = []